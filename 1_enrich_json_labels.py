@@ -53,8 +53,15 @@ def load_energy_lookup(demands_path):
         for b in energy_data
     }
 
+# energy lookup, set once per worker process by the pool initializer
+energy_lookup = {}
+
+def init_worker(demands_path):
+    global energy_lookup
+    energy_lookup = load_energy_lookup(demands_path)
+
 def process_file(args):
-    in_path, output_dir, energy_lookup = args
+    in_path, output_dir = args
     with open(in_path, "r", encoding="utf-8") as f:
         building_data = json.load(f)
 
@@ -98,14 +105,13 @@ if __name__ == "__main__":
         output_dir.mkdir(parents=True, exist_ok=True)
         demands_path = ROOT_DEMAND / f"clean_labels_{idx}.json"
 
-        # Load energy lookup for this index
-        energy_lookup = load_energy_lookup(demands_path)
-
+        # energy lookup is loaded once per worker, tasks only carry file paths
         files = list(input_dir.glob("*.json"))
-        args_list = [(f, output_dir, energy_lookup) for f in files]
+        args_list = [(f, output_dir) for f in files]
 
         validation_log = []
-        with concurrent.futures.ProcessPoolExecutor() as executor, tqdm(total=len(files), desc=f"enrich_{idx}") as pbar:
+        with concurrent.futures.ProcessPoolExecutor(initializer=init_worker, initargs=(demands_path,)) as executor, \
+                tqdm(total=len(files), desc=f"enrich_{idx}") as pbar:
             for result in executor.map(process_file, args_list, chunksize=20):
                 if result:
                     validation_log.append(result)
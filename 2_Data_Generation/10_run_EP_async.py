@@ -0,0 +1,213 @@
+"""
+asyncio EnergyPlus supervisor
+- runs the IDFs of 3_run_EP.py (same paths / weather / largest-first order) with
+  asyncio.create_subprocess_exec, stdout goes to a file instead of memory
+- watches eplusout.err while the run is in progress and kills the run as soon as a
+  Severe / Fatal error appears or the run exceeds JOB_TIMEOUT
+- writes a compact error summary per run to an SQLite index, so triage of
+  thousands of .err files is one query, e.g.
+
+    SELECT status, COUNT(*) FROM runs GROUP BY status;
+    SELECT pand, first_severe FROM runs WHERE severe > 0;
+
+    python 10_run_EP_async.py            simulate all IDFs
+    python 10_run_EP_async.py index      only index existing eplusout.err files
+"""
+
+import asyncio
+import importlib
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from multiprocessing import cpu_count
+from pathlib import Path
+
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+idf_folder  = ep.idf_folder
+output_root = ep.output_root
+epw_path    = ep.epw_path
+index_db    = output_root / "err_index_21.sqlite"
+
+N_PARALLEL   = max(1, cpu_count() - 1)
+JOB_TIMEOUT  = 3600                  # s
+POLL_SECONDS = 2                     # how often eplusout.err is checked
+ABORT_ON     = ("Severe", "Fatal")   # error levels that stop a run early
+
+ERR_LINE = re.compile(r"\*\*\s*(Warning|Severe|Fatal)\s*\*\*\s*(.*)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    pand          TEXT PRIMARY KEY,
+    status        TEXT,     -- ok / failed / aborted / timeout
+    seconds       REAL,
+    warnings      INTEGER,
+    severe        INTEGER,
+    fatal         INTEGER,
+    first_severe  TEXT,
+    fatal_message TEXT,
+    abort_reason  TEXT,
+    finished      TEXT
+);
+"""
+
+# error file triage
+
+def summarise_err(err_file: Path) -> dict:
+    """
+    Counts and first messages of an eplusout.err file.
+    """
+    summary = {"warnings": 0, "severe": 0, "fatal": 0, "first_severe": None, "fatal_message": None}
+    if not err_file.exists():
+        return summary
+    with open(err_file, "r", errors="replace") as f:
+        for line in f:
+            m = ERR_LINE.search(line)
+            if not m:
+                continue
+            level, message = m.group(1), m.group(2).strip()
+            if level == "Warning":
+                summary["warnings"] += 1
+            elif level == "Severe":
+                summary["severe"] += 1
+                summary["first_severe"] = summary["first_severe"] or message
+            else:
+                summary["fatal"] += 1
+                summary["fatal_message"] = summary["fatal_message"] or message
+    return summary
+
+def open_index() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(index_db))
+    conn.executescript(SCHEMA)
+    return conn
+
+def write_index(conn, pand: str, status: str, seconds, summary: dict, abort_reason=None) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (pand, status, seconds, summary["warnings"], summary["severe"], summary["fatal"],
+         summary["first_severe"], summary["fatal_message"], abort_reason,
+         time.strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+
+# supervised run
+
+async def watch(proc, err_file: Path, start: float):
+    """
+    Poll the new complete lines of eplusout.err until the process ends, a line that is still
+    being written is read again at the next poll.
+    Returns the reason the run was killed, or None.
+    """
+    offset = 0
+    while proc.returncode is None:
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=POLL_SECONDS)
+            break
+        except asyncio.TimeoutError:
+            pass
+        if time.time() - start > JOB_TIMEOUT:
+            proc.kill()
+            return f"timeout after {JOB_TIMEOUT} s"
+        if err_file.exists():
+            with open(err_file, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            end = data.rfind(b"\n") + 1
+            offset += end
+            new = data[:end].decode(errors="replace")
+            for m in ERR_LINE.finditer(new):
+                if m.group(1) in ABORT_ON:
+                    proc.kill()
+                    return f"{m.group(1)}: {m.group(2).strip()}"
+    return None
+
+async def run_one(idf_file: str, sem: asyncio.Semaphore, conn) -> str:
+    async with sem:
+        pand_name = Path(idf_file).stem
+        pand_output = output_root / pand_name
+        pand_output.mkdir(exist_ok=True)
+        err_file = pand_output / "eplusout.err"
+        err_file.unlink(missing_ok=True)
+
+        with tempfile.TemporaryDirectory() as td:
+            shutil.copy(idf_file, Path(td, "in.idf"))
+            cmd = [str(ep.eplus_exe), "--weather", str(epw_path),
+                   "--output-directory", str(pand_output), "--annual", "in.idf"]
+            if ep.needs_expandobjects(Path(td, "in.idf")):
+                cmd.insert(-1, "--expandobjects")
+
+            start = time.time()
+            with open(pand_output / "python_subprocess.log", "w") as log:
+                proc = await asyncio.create_subprocess_exec(*cmd, cwd=td, stdout=log,
+                                                            stderr=asyncio.subprocess.STDOUT)
+                abort_reason = await watch(proc, err_file, start)
+                await proc.wait()
+            seconds = round(time.time() - start, 1)
+
+        if abort_reason is None and proc.returncode == 0:
+            status = "ok"
+            ep.keep_only_eso_err(pand_output)
+        elif abort_reason is None:
+            status = "failed"
+        else:
+            status = "timeout" if abort_reason.startswith("timeout") else "aborted"
+        if status != "ok":
+            # killed / failed mid-run, the partial ESO must not be read as a result
+            ep.discard_results(pand_output)
+
+        write_index(conn, pand_name, status, seconds, summarise_err(err_file), abort_reason)
+        return status
+
+async def run_all(idfs: list) -> dict:
+    sem = asyncio.Semaphore(N_PARALLEL)
+    conn = open_index()
+    counts = {}
+    tasks = [asyncio.create_task(run_one(f, sem, conn)) for f in idfs]
+    for i, task in enumerate(asyncio.as_completed(tasks), 1):
+        status = await task
+        counts[status] = counts.get(status, 0) + 1
+        if i % 100 == 0 or i == len(tasks):
+            print(f"{i} / {len(tasks)} runs finished: {counts}")
+    conn.close()
+    return counts
+
+def index_existing() -> None:
+    """
+    Build the index from eplusout.err files of earlier runs.
+    """
+    conn = open_index()
+    n = 0
+    for err_file in output_root.glob("*/eplusout.err"):
+        summary = summarise_err(err_file)
+        text = err_file.read_text(errors="replace")
+        status = "ok" if "EnergyPlus Completed Successfully" in text else "failed"
+        write_index(conn, err_file.parent.name, status, None, summary)
+        n += 1
+    conn.close()
+    print(f"{n} error files indexed in {index_db}")
+
+# main
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "index":
+        index_existing()
+        sys.exit()
+
+    idfs = [str(p) for p in idf_folder.glob("*.idf")]
+    if not idfs:
+        print("No IDF files found – nothing to simulate.")
+        sys.exit()
+    idfs.sort(key=ep.estimate_cost, reverse=True)
+
+    print(f"Running {len(idfs)} IDFs, {N_PARALLEL} in parallel …")
+    start_time = time.time()
+    counts = asyncio.run(run_all(idfs))
+    elapsed = time.time() - start_time
+
+    print(f"\nRuns by status: {counts}")
+    print(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)")
+    print(f"Error index: {index_db}")
@@ -0,0 +1,259 @@
+"""
+retrofit parameter sweep over materials, windows, infiltration and WWR
+
+- SWEEP holds the values per parameter, variants are the full grid or a seeded
+  random sample of MAX_VARIANTS grid points (None keeps the archetype value of retrofit_NI.json)
+- the base model of every building is rendered once with 2_generate_IDF.py,
+  geometry / adjacency / window placement are not recomputed per variant
+- a variant patches only the MATERIAL (G / F / R layer), WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM,
+  ZONEINFILTRATION:DESIGNFLOWRATE objects and the window vertices (WWR) of the rendered text
+- variants with the same canonical model (sim_cache.py) are simulated once, results are
+  shared through the result cache of 3_run_EP.py, largest buildings first
+
+results in sweep_root/sims/<scenario>/<variant>/<pand>, parameters per variant in sweep_root/variants.csv
+"""
+
+import importlib
+import itertools
+import json
+import random
+import tempfile
+import time
+from collections import defaultdict
+from functools import lru_cache
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+
+import pandas as pd
+from tqdm import tqdm
+
+from idf_text import format_idf, get_vertices, read_idf, set_vertices
+from sim_cache import ResultCache, model_keys
+
+gen = importlib.import_module("2_generate_IDF")
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+input_dir    = gen.input_dir
+sweep_root   = Path(r"C:\retrofit_sweep_21")
+base_dir     = sweep_root / "base_idf"
+sims_dir     = sweep_root / "sims"
+variants_file = sweep_root / "variants.csv"
+records_file = sweep_root / "sweep_records.jsonl"
+log_file     = sweep_root / "sweep_log.txt"
+
+# scenarios of 3_run_EP.py whose weather file every variant is simulated with
+SCENARIOS = ["B1_retro_2020"]
+
+# parameter values, conductivity [W/m-K], thickness [m], U-factor [W/m2-K], infiltration [m3/s-m2 floor]
+SWEEP = {
+    "G.Conductivity": [0.025, 0.035, 0.045],
+    "G.Thickness":    [0.10, 0.20],
+    "F.Conductivity": [0.025, 0.035, 0.045],
+    "F.Thickness":    [0.10, 0.20, 0.30],
+    "R.Conductivity": [0.025, 0.035, 0.045],
+    "R.Thickness":    [0.15, 0.30],
+    "U_Factor":       [0.8, 1.2, 1.8, 2.9],
+    "SHGC":           [0.4, 0.6],
+    "Infiltration":   [0.0002, 0.0005, 0.001],
+    "WWR":            [0.2, 0.4, 0.6],
+}
+MAX_VARIANTS = 200     # grid points per building, None for the full grid
+SEED = 42
+
+MATERIAL_FIELDS = {"Thickness": 3, "Conductivity": 4}   # positions in MATERIAL objects
+GLAZING_FIELDS  = {"U_Factor": 2, "SHGC": 3}            # positions in WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM
+INFILTRATION_FIELD = 6                                   # Flow Rate per Floor Area
+
+sweep_root.mkdir(parents=True, exist_ok=True)
+base_dir.mkdir(exist_ok=True)
+
+# variants
+
+def make_variants(sweep: dict, max_variants, seed) -> pd.DataFrame:
+    """
+    Grid of all parameter values, sampled down to max_variants points.
+    """
+    names = list(sweep)
+    grid = list(itertools.product(*(sweep[n] for n in names)))
+    if max_variants is not None and len(grid) > max_variants:
+        grid = sorted(random.Random(seed).sample(grid, max_variants))
+    df = pd.DataFrame(grid, columns=names)
+    df.index = [f"v{i:04d}" for i in range(len(df))]
+    df.index.name = "Variant"
+    return df
+
+# base models, rendered once per building
+
+def render_base(json_path) -> list:
+    with open(json_path, "r") as f:
+        surface_data = json.load(f)
+    written = []
+    for pand_id, entry in surface_data.items():
+        building_name, idf = gen.build_idf(pand_id, entry)
+        out = base_dir / f"{building_name}.idf"
+        out.write_text(idf.idfstr())
+        written.append(str(out))
+    return written
+
+@lru_cache(maxsize=8)
+def load_template(base_idf: str) -> tuple:
+    """
+    Parsed base model and the wall vertices of every window, kept per worker
+    (jobs of one building are consecutive).
+    """
+    objects = read_idf(base_idf)
+    walls = {o[1].upper(): get_vertices(o) for o in objects
+             if o[0].upper() == "BUILDINGSURFACE:DETAILED"}
+    return objects, walls
+
+def patch_model(objects, walls, params: dict) -> list:
+    """
+    Variant of a base model, only material / window / infiltration objects are replaced.
+    """
+    def given(name):
+        value = params.get(name)
+        return value is not None and not pd.isna(value)
+
+    out = []
+    for obj in objects:
+        cls = obj[0].upper()
+        if cls == "MATERIAL" and obj[1].split(".", 1)[0] in ("G", "F", "R"):
+            layer = obj[1].split(".", 1)[0]
+            obj = list(obj)
+            for field, pos in MATERIAL_FIELDS.items():
+                if given(f"{layer}.{field}"):
+                    obj[pos] = str(params[f"{layer}.{field}"])
+        elif cls == "WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM":
+            obj = list(obj)
+            for field, pos in GLAZING_FIELDS.items():
+                if given(field):
+                    obj[pos] = str(params[field])
+        elif cls == "ZONEINFILTRATION:DESIGNFLOWRATE" and given("Infiltration"):
+            obj = list(obj)
+            obj[INFILTRATION_FIELD] = str(params["Infiltration"])
+        elif cls == "FENESTRATIONSURFACE:DETAILED" and given("WWR"):
+            if float(params["WWR"]) <= 0:
+                continue
+            # windows exist on the walls that are large enough, which does not depend on the WWR
+            vertices = gen.place_window(walls[obj[4].upper()], params["WWR"])
+            obj = set_vertices(obj, [tuple(v) for v in vertices])
+        out.append(obj)
+    return out
+
+# jobs: (base idf, variant id, parameters, scenario)
+
+def job_output(job) -> Path:
+    base_idf, variant, _, scenario = job
+    return sims_dir / scenario / variant / Path(base_idf).stem
+
+def job_keys(jobs_of_building: list) -> list:
+    """
+    Cache keys of all variants / scenarios of one building.
+    """
+    keys = []
+    for base_idf, variant, params, scenario in jobs_of_building:
+        objects, walls = load_template(base_idf)
+        keys.extend(model_keys(patch_model(objects, walls, params), [ep.scenario_weather(scenario)]))
+    return keys
+
+def run_variant(job) -> dict:
+    base_idf, variant, params, scenario = job
+    pand_output = job_output(job)
+    pand_output.mkdir(parents=True, exist_ok=True)
+
+    objects, walls = load_template(base_idf)
+    start = time.time()
+    with tempfile.TemporaryDirectory() as td:
+        Path(td, "in.idf").write_text(format_idf(patch_model(objects, walls, params)))
+        try:
+            status = ep.run_energyplus(td, pand_output, weather=ep.scenario_weather(scenario))
+        except OSError as exc:
+            (pand_output / "python_subprocess.log").write_text(str(exc))
+            status = "error"
+
+    return {"pand": Path(base_idf).stem, "variant": variant, "scenario": scenario, "status": status,
+            "seconds": round(time.time() - start, 1), "finished": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+# main
+
+def main() -> None:
+    files = [str(p) for p in Path(input_dir).glob("*.json")]
+    if not files:
+        print("No JSON files found – nothing to sweep.")
+        return
+
+    variants = make_variants(SWEEP, MAX_VARIANTS, SEED)
+    variants.to_csv(variants_file)
+    params = variants.to_dict("index")
+
+    n_workers = max(1, cpu_count() - 1)
+    start_time = time.time()
+    with Pool(n_workers) as pool:
+        base_idfs = []
+        for written in tqdm(pool.imap_unordered(render_base, files), total=len(files), desc="base models"):
+            base_idfs.extend(written)
+        base_idfs.sort()
+
+        by_building = [[(b, v, params[v], s) for v in variants.index for s in SCENARIOS] for b in base_idfs]
+        jobs = [job for group in by_building for job in group]
+        keys = [k for ks in tqdm(pool.imap(job_keys, by_building), total=len(by_building), desc="cache keys")
+                for k in ks]
+        print(f"{len(base_idfs)} buildings x {len(variants)} variants x {len(SCENARIOS)} scenarios "
+              f"= {len(jobs)} jobs")
+
+        groups = defaultdict(list)
+        for job, key in zip(jobs, keys):
+            groups[key].append(job)
+
+        cache = ResultCache(ep.cache_root)
+        num_success = num_hits = 0
+        to_run = []
+        for key, members in groups.items():
+            if cache.has(key):
+                for job in members:
+                    num_success += cache.restore(key, job_output(job))
+                num_hits += len(members)
+            else:
+                to_run.append(key)
+        print(f"{len(groups)} unique models, {num_hits} cache hits, {len(to_run)} to simulate")
+
+        costs = dict(zip(base_idfs, pool.map(ep.estimate_cost, base_idfs, chunksize=50)))
+        reps = {groups[key][0]: key for key in to_run}
+        order = sorted(reps, key=lambda job: costs[job[0]], reverse=True)
+
+        with open(records_file, "a") as rec, tqdm(total=len(order), desc="simulations") as pbar:
+            by_id = {(Path(job[0]).stem, job[1], job[3]): job for job in order}
+            for record in pool.imap_unordered(run_variant, order, chunksize=1):
+                job = by_id[(record["pand"], record["variant"], record["scenario"])]
+                rec.write(json.dumps(record) + "\n")
+                rec.flush()
+                pbar.update(1)
+                if record["status"] != "ok":
+                    continue
+                key = reps[job]
+                cache.put(key, job_output(job), source=f"{record['pand']}/{record['variant']}")
+                num_success += 1
+                for other in groups[key][1:]:
+                    num_success += cache.restore(key, job_output(other))
+                    num_hits += 1
+    elapsed = time.time() - start_time
+
+    print(f"\nVariant results: {num_success} / {len(jobs)} successful")
+    print(f"Simulated: {len(to_run)}, reused: {num_hits}")
+    print(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)")
+
+    with open(log_file, "w") as f:
+        f.write("Retrofit sweep summary\n")
+        f.write(f"Buildings: {len(base_idfs)}, variants: {len(variants)}, scenarios: {len(SCENARIOS)}\n")
+        f.write(f"Successful variant results: {num_success} / {len(jobs)}\n")
+        f.write(f"Simulated: {len(to_run)}, reused from cache: {num_hits}\n")
+        f.write(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)\n")
+
+    print(f"Variants written to: {variants_file}")
+    print(f"Results in: {sims_dir}")
+
+
+if __name__ == "__main__":
+    main()
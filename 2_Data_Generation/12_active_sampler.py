@@ -0,0 +1,217 @@
+"""
+active learning sampler: decide which buildings to simulate
+
+- input: flattened geometry features (columns of 3A_flatten_geo_all.py, targets not needed)
+- simulate a space-filling initial subset (farthest point sampling on standardised features)
+- fit a random forest surrogate on annual heating / cooling per floor area
+- add the buildings with the largest spread between the trees (diverse batch out of the
+  most uncertain ones) until the out-of-bag error is below TARGET_ERROR or MAX_SIMULATIONS
+- simulations run through 3_run_EP.py (largest first, result cache when ep.USE_CACHE), one scenario
+
+outputs in output_dir:
+  simulated.csv     simulated buildings, round of selection, simulated targets
+  predicted.csv     the other buildings, surrogate mean / std
+  rounds.csv        per round: simulations, OOB error per target
+"""
+
+import importlib
+import time
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from eso_reader import COOLING, HEATING, read_results, summarise
+
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+SCENARIO = "B1_retro_2020"        # scenario of 3_run_EP.SCENARIOS (IDF variant + weather)
+
+features_csv = Path(r"C:\3_flatten_feat\flattened_geometry_all.csv")
+idf_folder   = ep.scenario_idf_folder(SCENARIO)
+output_dir   = Path(r"C:\active_sampler_21")
+
+NUMERIC = [
+    "Construction Year", "Number of Floors", "Wall Area", "Roof Area (Flat)", "Roof Area (Sloped)",
+    "Floor Area", "Shared Wall Area", "Building Height (70%)", "Building Volume",
+    "Total Floor Area", "Compactness Ratio",
+]
+CATEGORICAL = ["Archetype ID"]
+TARGETS = ["Annual Heating", "Annual Cooling"]       # kWh, the surrogate learns kWh / m2 floor area
+
+INITIAL_SIZE    = 500
+BATCH_SIZE      = 250
+CANDIDATE_POOL  = 4          # batch is spread over the BATCH_SIZE x CANDIDATE_POOL most uncertain
+MAX_SIMULATIONS = 5000
+TARGET_ERROR    = 0.05       # OOB RMSE / mean, per target
+N_TREES         = 300
+SEED = 42
+
+output_dir.mkdir(parents=True, exist_ok=True)
+
+# features
+
+def load_features(path) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype={"Pand ID": str})
+    df["Pand ID"] = df["Pand ID"].str.split(".").str[-1]
+    df = df.drop_duplicates("Pand ID").reset_index(drop=True)
+    df[NUMERIC] = df[NUMERIC].apply(pd.to_numeric, errors="coerce")
+    return df.dropna(subset=NUMERIC).reset_index(drop=True)
+
+def design_matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    Standardised numeric features + one-hot archetype.
+    """
+    num = df[NUMERIC].to_numpy(dtype=float)
+    num = (num - num.mean(axis=0)) / np.where(num.std(axis=0) > 0, num.std(axis=0), 1.0)
+    cat = pd.get_dummies(df[CATEGORICAL].astype(str)).to_numpy(dtype=float)
+    return np.hstack([num, cat])
+
+def farthest_points(X: np.ndarray, k: int, candidates: np.ndarray, chosen: np.ndarray, rng) -> np.ndarray:
+    """
+    Greedy max-min selection of k rows out of candidates, away from the chosen rows.
+    """
+    k = min(k, len(candidates))
+    if k == 0:
+        return np.array([], dtype=int)
+    pts = X[candidates]
+    if len(chosen):
+        dist = np.full(len(candidates), np.inf)
+        sq = (pts ** 2).sum(axis=1)
+        for start in range(0, len(chosen), 256):
+            block = X[chosen[start:start + 256]]
+            d = sq[:, None] + (block ** 2).sum(axis=1)[None, :] - 2 * pts @ block.T
+            dist = np.minimum(dist, d.min(axis=1))
+    else:
+        dist = ((pts - pts[rng.integers(len(pts))]) ** 2).sum(axis=1)
+    picked = []
+    for _ in range(k):
+        i = int(np.argmax(dist))
+        picked.append(i)
+        dist = np.minimum(dist, ((pts - pts[i]) ** 2).sum(axis=1))
+    return candidates[picked]
+
+# simulation
+
+def simulate(pool, pand_codes: list) -> dict:
+    """
+    Simulate the given buildings, returns {pand code: (heating kWh, cooling kWh)}.
+    Only jobs with status ok (successful run or cache hit) are read, failed runs are left out.
+    """
+    jobs = {code: (str(idf_folder / f"Pand.{code}.idf"), SCENARIO) for code in pand_codes}
+    jobs = {code: job for code, job in jobs.items() if Path(job[0]).exists()}
+    if ep.USE_CACHE:
+        status, _ = ep.run_with_cache(pool, list(jobs.values()))
+    else:
+        status = ep.run_scheduled(pool, list(jobs.values()))
+
+    out = {}
+    for code, job in jobs.items():
+        if not status.get(job):
+            continue
+        folder = ep.scenario_root(SCENARIO) / f"Pand.{code}"
+        try:
+            series = read_results(folder)
+            out[code] = (summarise(series[HEATING])["annual"], summarise(series[COOLING])["annual"])
+        except (OSError, KeyError, ValueError):
+            continue
+    return out
+
+# surrogate
+
+def fit_surrogate(X, y):
+    model = RandomForestRegressor(n_estimators=N_TREES, min_samples_leaf=2, oob_score=True,
+                                  n_jobs=-1, random_state=SEED)
+    model.fit(X, y)
+    oob = model.oob_prediction_
+    rmse = np.sqrt(((oob - y) ** 2).mean(axis=0))
+    rel_error = rmse / np.maximum(np.abs(y.mean(axis=0)), 1e-9)
+    return model, rel_error
+
+def predict_with_std(model, X, scale) -> tuple:
+    per_tree = np.stack([tree.predict(X) for tree in model.estimators_])
+    mean = per_tree.mean(axis=0)
+    std = per_tree.std(axis=0)
+    score = (std / scale).sum(axis=1)          # relative spread summed over targets
+    return mean, std, score
+
+# main
+
+def main() -> None:
+    rng = np.random.default_rng(SEED)
+    df = load_features(features_csv)
+    X = design_matrix(df)
+    area = df["Total Floor Area"].to_numpy(dtype=float).clip(min=1.0)
+    codes = df["Pand ID"].to_numpy()
+    print(f"{len(df)} buildings with complete features")
+
+    start_time = time.time()
+    labels = {}
+    selected_round = {}
+    rounds = []
+    unusable = set()
+    n_workers = max(1, cpu_count() - 1)
+    with Pool(n_workers) as pool:
+        batch = farthest_points(X, INITIAL_SIZE, np.arange(len(df)), np.array([], dtype=int), rng)
+        round_no = 0
+        while True:
+            results = simulate(pool, list(codes[batch]))
+            for i in batch:
+                selected_round[i] = round_no
+                if codes[i] in results:
+                    labels[i] = results[codes[i]]
+                else:
+                    unusable.add(i)
+
+            done = np.array(sorted(labels))
+            if len(done) == 0:
+                # nothing to fit the surrogate on, all IDFs missing or all runs failed
+                print(f"No simulation results in round {round_no}: {len(unusable)} buildings without IDF in "
+                      f"{idf_folder} or with a failed run – check the IDFs / EnergyPlus logs.")
+                return
+            y = np.array([labels[i] for i in done]) / area[done, None]
+            model, rel_error = fit_surrogate(X[done], y)
+            rounds.append({"round": round_no, "simulated": len(done),
+                           **{f"{t} OOB rel. RMSE": round(float(e), 4) for t, e in zip(TARGETS, rel_error)}})
+            print(f"round {round_no}: {len(done)} simulated, OOB relative RMSE "
+                  + ", ".join(f"{t}: {e:.3f}" for t, e in zip(TARGETS, rel_error)))
+
+            rest = np.array([i for i in range(len(df)) if i not in selected_round])
+            if (rel_error <= TARGET_ERROR).all() or len(done) >= MAX_SIMULATIONS or len(rest) == 0:
+                break
+
+            _, _, score = predict_with_std(model, X[rest], np.abs(y.mean(axis=0)))
+            n_batch = min(BATCH_SIZE, MAX_SIMULATIONS - len(done))
+            top = rest[np.argsort(score)[::-1][:n_batch * CANDIDATE_POOL]]
+            batch = farthest_points(X, n_batch, top, done, rng)
+            round_no += 1
+
+    done = np.array(sorted(labels))
+    simulated = df.loc[done].copy()
+    simulated["Round"] = [selected_round[i] for i in done]
+    simulated[TARGETS] = np.array([labels[i] for i in done])
+    simulated.to_csv(output_dir / "simulated.csv", index=False)
+
+    rest = np.array([i for i in range(len(df)) if i not in labels])
+    predicted = df.loc[rest].copy() if len(rest) else df.iloc[:0].copy()
+    if len(rest):
+        mean, std, _ = predict_with_std(model, X[rest], 1.0)
+        predicted[TARGETS] = mean * area[rest, None]
+        predicted[[f"{t} Std" for t in TARGETS]] = std * area[rest, None]
+        predicted["Simulation Failed"] = [i in unusable for i in rest]
+    predicted.to_csv(output_dir / "predicted.csv", index=False)
+    pd.DataFrame(rounds).to_csv(output_dir / "rounds.csv", index=False)
+
+    elapsed = time.time() - start_time
+    print(f"\nSimulated {len(done)} / {len(df)} buildings ({len(unusable)} failed), "
+          f"predicted {len(rest)}")
+    print(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)")
+    print(f"Results written to: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
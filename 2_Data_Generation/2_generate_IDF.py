@@ -3,6 +3,7 @@ generate IDF from input JSON file per building
 save each IDF file locally for verification 
 note hard saving the IDF files could be skipped after verifying the input data is correct 
 to avoid saving thousands of input files locally
+-> 4_generate_and_run.py streams the models from build_idf straight into the simulation
 """
 
 import os
@@ -16,20 +17,25 @@ from tqdm import tqdm
 import boto3
 import time
 
+from facade_merge import merge_coplanar_walls
+from output_profiles import PROFILES, add_output_objects
+
 # paths
 
 input_dir = Path(r"C:\clean_21")
-output_dir = Path(r"C:\idf_21")
+output_dir = Path(r"C:\2_idf_files\B_retro\idf_21")   # variant folder of 3_run_EP.VARIANTS
 log_file = Path(r"C:\idf_log_21.txt")
 
 
-# B1 retrofit / 2020 (ROTTERDAM BASE FILE)
+# B retrofit (ROTTERDAM BASE FILE)
 
 idd_path = Path(r"C:\EnergyPlusV24-2-0\Energy+.idd")
 materials_file_path = Path(r"C:\retrofit_NI.json") 
 
 """
-update base IDF file per scenario (2020, 2050, 2080)
+base IDF file per variant (base / retrofit), 3_run_EP.py runs the IDFs with every weather file
+(2020, 2050, 2080). the base files only differ in Site:Location, which EnergyPlus replaces by
+the location of the EPW for weather file run periods.
 note the base IDF file is needed to add IDF objects to (cannot create new IDF file from scratch)
 
 inputs files:
@@ -42,6 +48,34 @@ debilt_base_file_2080
 
 base_idf_path = Path(r"C:\rotterdam_base_file_2020.idf") 
 
+# write the ideal loads objects that ExpandObjects would create from HVACTEMPLATE:ZONE:IDEALLOADSAIRSYSTEM
+# so simulations run without --expandobjects (False = legacy HVACTemplate)
+# check with 5_verify_ideal_loads.py after EnergyPlus updates
+WRITE_IDEAL_LOADS = True
+
+# reporting per simulation, see output_profiles.py
+# "hourly" (hourly store / peaks), "daily", "monthly" or "annual" (meters only)
+OUTPUT_PROFILE = "hourly"
+
+# simulation fidelity, compare profiles with 8_benchmark_fidelity.py before using a cheaper one
+# timestep None keeps the base file value (6 per hour)
+FIDELITY_PROFILES = {
+    "reference": {"solar_distribution": "FullExterior", "max_warmup_days": 25,
+                  "loads_tolerance": 0.04, "temperature_tolerance": 0.4, "timesteps": None},
+    "standard":  {"solar_distribution": "FullExterior", "max_warmup_days": 25,
+                  "loads_tolerance": 0.04, "temperature_tolerance": 0.4, "timesteps": 4},
+    "fast":      {"solar_distribution": "MinimalShadowing", "max_warmup_days": 15,
+                  "loads_tolerance": 0.1, "temperature_tolerance": 0.5, "timesteps": 4},
+    "screening": {"solar_distribution": "MinimalShadowing", "max_warmup_days": 6,
+                  "loads_tolerance": 0.2, "temperature_tolerance": 0.5, "timesteps": 2},
+}
+FIDELITY = "reference"
+
+# merge adjacent coplanar walls (same boundary condition / height) and drop collinear vertices
+# before the surfaces are written, see facade_merge.py. tolerance in JSON coordinate units (mm)
+MERGE_COPLANAR = False
+MERGE_TOLERANCE = 10
+
 S3_BUCKET = ""  # leave empty to save locally 
 OUTPUT_PREFIX = "idf_files"
 
@@ -94,6 +128,65 @@ def exposure_flags(outside_bc):
         return "NoSun", "NoWind"
     return "SunExposed", "WindExposed"
 
+# WINDOW PLACEMENT
+
+MIN_WALL_WIDTH = 1.5
+MIN_WALL_HEIGHT = 1.5
+WINDOW_ASPECT = 1.6  # Target aspect ratio (width:height)
+
+def place_window(coords_3d, wwr):
+    """
+    One window centred in a rectangular wall (4 vertices) for the given window wall ratio.
+    Returns the 4 window vertices, or None when the wall is too small for a window.
+    """
+    p = np.array(coords_3d)
+    v1 = p[1] - p[0]
+    v2 = p[3] - p[0]
+    wall_width = np.linalg.norm(v1)
+    wall_height = np.linalg.norm(v2)
+
+    if wall_width < MIN_WALL_WIDTH or wall_height < MIN_WALL_HEIGHT:
+        return None
+
+    wall_area = wall_width * wall_height
+    desired_win_area = wall_area * float(wwr)
+    aspect = WINDOW_ASPECT
+
+    # Compute max window size for target aspect that fits wall
+    max_win_width = wall_width - 1e-4
+    max_win_height = wall_height - 1e-4
+
+    # 1. Start with target aspect and desired area
+    win_height = (desired_win_area / aspect) ** 0.5
+    win_width = win_height * aspect
+
+    # 2. Fix to wall size, adjust aspect dynamically if needed
+    if win_width > max_win_width:
+        win_width = max_win_width
+        win_height = win_width / aspect
+    if win_height > max_win_height:
+        win_height = max_win_height
+        win_width = win_height * aspect
+
+    # 3. If window still doesn't fit, reduce size (ignoring the aspect ratio) to max possible WWR
+    if win_width > max_win_width or win_height > max_win_height:
+        scale = min(max_win_width / win_width, max_win_height / win_height)
+        win_width *= scale
+        win_height *= scale
+
+    # 4. (Optional) recalculate actual window area and WWR
+    # final_wwr = win_width * win_height / wall_area
+
+    # 5. Center window in wall
+    offset1 = 0.5 - win_width / (2 * wall_width)
+    offset2 = 0.5 - win_height / (2 * wall_height)
+    o = p[0] + offset1 * v1 + offset2 * v2
+    win_p1 = o
+    win_p2 = o + win_width * v1 / wall_width
+    win_p3 = o + win_width * v1 / wall_width + win_height * v2 / wall_height
+    win_p4 = o + win_height * v2 / wall_height
+    return [win_p1, win_p2, win_p3, win_p4]
+
 # DUAL SETPOINT
 
 def add_dualsetpoint_controltype_schedule(idf):
@@ -119,6 +212,56 @@ def add_dualsetpoint_controltype_schedule(idf):
         )
 
 
+# IDEAL LOADS AIR SYSTEM
+
+def add_ideal_loads_objects(idf, zone_name):
+    """
+    Expanded form of HVACTEMPLATE:ZONE:IDEALLOADSAIRSYSTEM with default fields:
+    ideal loads system + zone equipment list + zone equipment connections.
+    Names follow ExpandObjects so output keys stay the same.
+    """
+    system_name = f"{zone_name} Ideal Loads Air System"
+    supply_node = f"{zone_name} Ideal Loads Supply Inlet"
+    equipment_list = f"{zone_name} Equipment"
+
+    idf.newidfobject(
+        "ZONEHVAC:IDEALLOADSAIRSYSTEM",
+        Name=system_name,
+        Zone_Supply_Air_Node_Name=supply_node,
+        Maximum_Heating_Supply_Air_Temperature=50,
+        Minimum_Cooling_Supply_Air_Temperature=13,
+        Maximum_Heating_Supply_Air_Humidity_Ratio=0.0156,
+        Minimum_Cooling_Supply_Air_Humidity_Ratio=0.0077,
+        Heating_Limit="NoLimit",
+        Cooling_Limit="NoLimit",
+        Dehumidification_Control_Type="ConstantSensibleHeatRatio",
+        Cooling_Sensible_Heat_Ratio=0.7,
+        Humidification_Control_Type="None",
+        Demand_Controlled_Ventilation_Type="None",
+        Outdoor_Air_Economizer_Type="NoEconomizer",
+        Heat_Recovery_Type="None",
+        Sensible_Heat_Recovery_Effectiveness=0.7,
+        Latent_Heat_Recovery_Effectiveness=0.65,
+    )
+    idf.newidfobject(
+        "ZONEHVAC:EQUIPMENTLIST",
+        Name=equipment_list,
+        Load_Distribution_Scheme="SequentialLoad",
+        Zone_Equipment_1_Object_Type="ZoneHVAC:IdealLoadsAirSystem",
+        Zone_Equipment_1_Name=system_name,
+        Zone_Equipment_1_Cooling_Sequence=1,
+        Zone_Equipment_1_Heating_or_NoLoad_Sequence=1,
+    )
+    idf.newidfobject(
+        "ZONEHVAC:EQUIPMENTCONNECTIONS",
+        Zone_Name=zone_name,
+        Zone_Conditioning_Equipment_List_Name=equipment_list,
+        Zone_Air_Inlet_Node_or_NodeList_Name=supply_node,
+        Zone_Air_Node_Name=f"{zone_name} Zone Air Node",
+        Zone_Return_Air_Node_or_NodeList_Name=f"{zone_name} Return Outlet",
+    )
+
+
 def add_file_suppression_objects(idf):
     """
     added OUTPUTCONTROL:FILES object that disables all files generated by EP sim
@@ -164,6 +307,195 @@ def add_file_suppression_objects(idf):
     )
 
 
+# build one IDF per building
+
+def build_idf(pand_id, entry, ideal_loads=WRITE_IDEAL_LOADS, output_profile=OUTPUT_PROFILE,
+              fidelity=FIDELITY, merge_coplanar=MERGE_COPLANAR):
+    """
+    Create the IDF model of one building from its JSON entry.
+    ideal_loads=False writes the HVACTemplate instead of the expanded objects.
+    Returns (building_name, idf).
+    """
+    archetype_id = entry["Archetype ID"]
+    surfaces = entry["Surfaces"]
+    if merge_coplanar:
+        surfaces, _ = merge_coplanar_walls(surfaces, MERGE_TOLERANCE)
+    materials = material_defs.get(archetype_id, {}).get("Materials", [])
+
+    # Handles both 'NL.IMBAG.Pand.0599100000013049' and '0599100000013049' depending on file name structure
+    pand_code = pand_id.split('.')[-1] if '.' in pand_id else pand_id
+    building_name = f"Pand.{pand_code}"
+    zone_name = f"Zone_{pand_code}"
+    
+
+    idf = IDF(StringIO(base_idf_str))
+    add_file_suppression_objects(idf)
+
+    fid = FIDELITY_PROFILES[fidelity]
+    if fid["timesteps"]:
+        idf.idfobjects["TIMESTEP"][0].Number_of_Timesteps_per_Hour = fid["timesteps"]
+
+    # assign material data based on surface types G / F / R
+
+    for surf_type in ['G', 'F', 'R']:
+        mat_id = f"{surf_type}.{archetype_id}"
+        mat = next((m for m in materials if isinstance(m, dict) and m.get("Material ID") == mat_id), None)
+        if mat:
+            idf.newidfobject("MATERIAL", Name=mat_id, Roughness=mat["Roughness"],
+                             Thickness=mat["Thickness"], Conductivity=mat["Conductivity"],
+                             Density=mat["Density"], Specific_Heat=mat["Specific Heat Capacity"],
+                             Thermal_Absorptance=0.9, Solar_Absorptance=0.7)
+            idf.newidfobject("CONSTRUCTION", Name=f"C_{surf_type}", Outside_Layer=mat_id)
+
+    # create IDF objects 
+    existing_limits = [obj.Name.upper() for obj in idf.idfobjects["SCHEDULETYPELIMITS"]]
+    if "TEMPERATURE" not in existing_limits:
+        idf.newidfobject("SCHEDULETYPELIMITS", Name="Temperature", Lower_Limit_Value=-100,
+                         Upper_Limit_Value=100, Numeric_Type="CONTINUOUS", Unit_Type="Temperature")
+    if "FRACTION" not in existing_limits:
+        idf.newidfobject("SCHEDULETYPELIMITS", Name="Fraction", Lower_Limit_Value=0,
+                         Upper_Limit_Value=1, Numeric_Type="CONTINUOUS", Unit_Type="Dimensionless")
+
+    idf.newidfobject("SITE:GROUNDTEMPERATURE:BUILDINGSURFACE", **{f"{month}_Ground_Temperature": 18 for month in [
+        "January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]})
+
+    idf.newidfobject("BUILDING", Name=building_name, North_Axis=0.0, Terrain="City",
+                     Loads_Convergence_Tolerance_Value=fid["loads_tolerance"],
+                     Temperature_Convergence_Tolerance_Value=fid["temperature_tolerance"],
+                     Solar_Distribution=fid["solar_distribution"],
+                     Maximum_Number_of_Warmup_Days=fid["max_warmup_days"])
+
+    idf.newidfobject("ZONE", Name=zone_name, Direction_of_Relative_North=0.0,
+                     X_Origin=0.0, Y_Origin=0.0, Z_Origin=0.0, Type=1, Multiplier=1,
+                     Ceiling_Height="Autocalculate", Volume="Autocalculate")
+
+    if ideal_loads:
+        add_ideal_loads_objects(idf, zone_name)
+    else:
+        idf.newidfobject("HVACTEMPLATE:ZONE:IDEALLOADSAIRSYSTEM", Zone_Name=zone_name)
+
+    idf.newidfobject("SCHEDULE:COMPACT", Name=f"HeatingSetpoint_{zone_name}",
+                     Schedule_Type_Limits_Name="Temperature", Field_1="Through: 12/31",
+                     Field_2="For: AllDays", Field_3="Until: 24:00", Field_4="21.0")
+    idf.newidfobject("SCHEDULE:COMPACT", Name=f"CoolingSetpoint_{zone_name}",
+                     Schedule_Type_Limits_Name="Temperature", Field_1="Through: 12/31",
+                     Field_2="For: AllDays", Field_3="Until: 24:00", Field_4="24.0")
+
+    idf.newidfobject("THERMOSTATSETPOINT:DUALSETPOINT", Name=f"Thermostat_{zone_name}",
+                     Heating_Setpoint_Temperature_Schedule_Name=f"HeatingSetpoint_{zone_name}",
+                     Cooling_Setpoint_Temperature_Schedule_Name=f"CoolingSetpoint_{zone_name}")
+    
+    add_dualsetpoint_controltype_schedule(idf)
+
+    idf.newidfobject("ZONECONTROL:THERMOSTAT", Name=f"ThermostatControl_{zone_name}",
+                     Zone_or_ZoneList_Name=zone_name, Control_Type_Schedule_Name="DualSetpointControlType",
+                     Control_1_Object_Type="ThermostatSetpoint:DualSetpoint",
+                     Control_1_Name=f"Thermostat_{zone_name}")
+
+    
+    idf.newidfobject("SCHEDULE:COMPACT", Name="AlwaysOn", Schedule_Type_Limits_Name="Fraction",
+                     Field_1="Through: 12/31", Field_2="For: AllDays", Field_3="Until: 24:00", Field_4="1.0")
+
+    infiltration_qv = material_defs.get(archetype_id, {}).get("Infiltration", 0)
+    idf.newidfobject("ZONEINFILTRATION:DESIGNFLOWRATE", Name=f"Infil_{zone_name}",
+                     Zone_or_ZoneList_or_Space_or_SpaceList_Name=zone_name, Schedule_Name="AlwaysOn",
+                     Design_Flow_Rate_Calculation_Method="Flow/Area", Flow_Rate_per_Floor_Area=infiltration_qv)
+
+    # WINDOW OBJECTS 
+    
+    for mat in materials:
+        if "Window ID" in mat:
+            idf.newidfobject("WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM", Name=mat["Window ID"],
+                             UFactor=mat["U_Factor"], Solar_Heat_Gain_Coefficient=mat["SHGC"],
+                             Visible_Transmittance=0.6)
+
+
+    archetype_wwr = material_defs.get(archetype_id, {}).get("WWR", 0.4)  # fallback 0.4
+
+    for i, surface in enumerate(surfaces):
+        coords = surface["Coordinates"][0]  # outer ring only
+        coords_3d = [(x / 1000, y / 1000, z / 1000) for x, y, z in coords]
+        surface_type = surface["Type"]
+        surf_name = f"{surface_type}_{i}"
+        surf_map = {'G': 'Floor', 'R': 'Roof', 'F': 'Wall'}
+        bc_map = {'G': 'Ground', 'R': 'Outdoors', 'F': 'Outdoors'}
+        if surface_type not in surf_map:
+            continue
+
+        outside_bc = bc_map[surface_type]
+        sun_exp, wind_exp = exposure_flags(outside_bc)
+
+        if surface_type == "F":
+            boundary_cond = surface.get("BoundaryCondition", "EXPOSED")
+            if boundary_cond.upper() == "ADIABATIC":
+                outside_bc = "Adiabatic"
+                sun_exp = "NoSun"
+                wind_exp = "NoWind"
+
+        idf_surface = idf.newidfobject(
+            "BUILDINGSURFACE:DETAILED",
+            Name=surf_name,
+            Surface_Type=surf_map[surface_type],
+            Construction_Name=f"C_{surface_type}",
+            Zone_Name=zone_name,
+            Outside_Boundary_Condition=outside_bc,
+            Sun_Exposure=sun_exp,
+            Wind_Exposure=wind_exp,
+            View_Factor_to_Ground=0.5,
+            Number_of_Vertices=len(coords_3d)
+        )
+        for j, (x, y, z) in enumerate(coords_3d):
+            idf_surface[f"Vertex_{j+1}_Xcoordinate"] = x
+            idf_surface[f"Vertex_{j+1}_Ycoordinate"] = y
+            idf_surface[f"Vertex_{j+1}_Zcoordinate"] = z
+
+        # generate window geometry for surface types F
+        if (
+            surface_type == "F"
+            and surface.get("BoundaryCondition", "EXPOSED").upper() == "EXPOSED"
+            and len(coords_3d) == 4
+        ):
+            window_vertices = place_window(coords_3d, archetype_wwr)
+
+            if window_vertices is not None:
+                # get window archetype from input data 
+                window_construction = None
+                for mat in materials:
+                    if "Window ID" in mat:
+                        window_construction = mat["Window ID"]
+                if not window_construction:
+                    window_construction = "W.TI.1946"  # fallback if window archetype not found 
+
+                window_constr = ensure_window_construction(idf, archetype_id, window_construction)
+
+                idf.newidfobject(
+                    "FENESTRATIONSURFACE:DETAILED",
+                    Name=f"WIN_{surf_name}",
+                    Surface_Type="Window",
+                    Construction_Name=window_constr,
+                    Building_Surface_Name=surf_name,
+                    Number_of_Vertices=4,
+                    Vertex_1_Xcoordinate=window_vertices[0][0],
+                    Vertex_1_Ycoordinate=window_vertices[0][1],
+                    Vertex_1_Zcoordinate=window_vertices[0][2],
+                    Vertex_2_Xcoordinate=window_vertices[1][0],
+                    Vertex_2_Ycoordinate=window_vertices[1][1],
+                    Vertex_2_Zcoordinate=window_vertices[1][2],
+                    Vertex_3_Xcoordinate=window_vertices[2][0],
+                    Vertex_3_Ycoordinate=window_vertices[2][1],
+                    Vertex_3_Zcoordinate=window_vertices[2][2],
+                    Vertex_4_Xcoordinate=window_vertices[3][0],
+                    Vertex_4_Ycoordinate=window_vertices[3][1],
+                    Vertex_4_Zcoordinate=window_vertices[3][2]
+                )
+
+    # OUTPUTS
+
+    add_output_objects(idf, output_profile)
+
+    return building_name, idf
+
+
 # load building data 
 
 def process_file(json_path):
@@ -172,226 +504,7 @@ def process_file(json_path):
             surface_data = json.load(f)
 
         for pand_id, entry in surface_data.items():
-            archetype_id = entry["Archetype ID"]
-            surfaces = entry["Surfaces"]
-            materials = material_defs.get(archetype_id, {}).get("Materials", [])
-
-            # Handles both 'NL.IMBAG.Pand.0599100000013049' and '0599100000013049' depending on file name structure
-            pand_code = pand_id.split('.')[-1] if '.' in pand_id else pand_id
-            building_name = f"Pand.{pand_code}"
-            zone_name = f"Zone_{pand_code}"
-            
-
-            idf = IDF(StringIO(base_idf_str))
-            add_file_suppression_objects(idf)
-
-            # assign material data based on surface types G / F / R
-
-            for surf_type in ['G', 'F', 'R']:
-                mat_id = f"{surf_type}.{archetype_id}"
-                mat = next((m for m in materials if isinstance(m, dict) and m.get("Material ID") == mat_id), None)
-                if mat:
-                    idf.newidfobject("MATERIAL", Name=mat_id, Roughness=mat["Roughness"],
-                                     Thickness=mat["Thickness"], Conductivity=mat["Conductivity"],
-                                     Density=mat["Density"], Specific_Heat=mat["Specific Heat Capacity"],
-                                     Thermal_Absorptance=0.9, Solar_Absorptance=0.7)
-                    idf.newidfobject("CONSTRUCTION", Name=f"C_{surf_type}", Outside_Layer=mat_id)
-
-            # create IDF objects 
-            existing_limits = [obj.Name.upper() for obj in idf.idfobjects["SCHEDULETYPELIMITS"]]
-            if "TEMPERATURE" not in existing_limits:
-                idf.newidfobject("SCHEDULETYPELIMITS", Name="Temperature", Lower_Limit_Value=-100,
-                                 Upper_Limit_Value=100, Numeric_Type="CONTINUOUS", Unit_Type="Temperature")
-            if "FRACTION" not in existing_limits:
-                idf.newidfobject("SCHEDULETYPELIMITS", Name="Fraction", Lower_Limit_Value=0,
-                                 Upper_Limit_Value=1, Numeric_Type="CONTINUOUS", Unit_Type="Dimensionless")
-
-            idf.newidfobject("SITE:GROUNDTEMPERATURE:BUILDINGSURFACE", **{f"{month}_Ground_Temperature": 18 for month in [
-                "January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]})
-
-            idf.newidfobject("BUILDING", Name=building_name, North_Axis=0.0, Terrain="City",
-                             Loads_Convergence_Tolerance_Value=0.04,
-                             Temperature_Convergence_Tolerance_Value=0.4,
-                             Solar_Distribution="FullExterior", Maximum_Number_of_Warmup_Days=25)
-
-            idf.newidfobject("ZONE", Name=zone_name, Direction_of_Relative_North=0.0,
-                             X_Origin=0.0, Y_Origin=0.0, Z_Origin=0.0, Type=1, Multiplier=1,
-                             Ceiling_Height="Autocalculate", Volume="Autocalculate")
-
-            idf.newidfobject("HVACTEMPLATE:ZONE:IDEALLOADSAIRSYSTEM", Zone_Name=zone_name)
-
-            idf.newidfobject("SCHEDULE:COMPACT", Name=f"HeatingSetpoint_{zone_name}",
-                             Schedule_Type_Limits_Name="Temperature", Field_1="Through: 12/31",
-                             Field_2="For: AllDays", Field_3="Until: 24:00", Field_4="21.0")
-            idf.newidfobject("SCHEDULE:COMPACT", Name=f"CoolingSetpoint_{zone_name}",
-                             Schedule_Type_Limits_Name="Temperature", Field_1="Through: 12/31",
-                             Field_2="For: AllDays", Field_3="Until: 24:00", Field_4="24.0")
-
-            idf.newidfobject("THERMOSTATSETPOINT:DUALSETPOINT", Name=f"Thermostat_{zone_name}",
-                             Heating_Setpoint_Temperature_Schedule_Name=f"HeatingSetpoint_{zone_name}",
-                             Cooling_Setpoint_Temperature_Schedule_Name=f"CoolingSetpoint_{zone_name}")
-            
-            add_dualsetpoint_controltype_schedule(idf)
-
-            idf.newidfobject("ZONECONTROL:THERMOSTAT", Name=f"ThermostatControl_{zone_name}",
-                             Zone_or_ZoneList_Name=zone_name, Control_Type_Schedule_Name="DualSetpointControlType",
-                             Control_1_Object_Type="ThermostatSetpoint:DualSetpoint",
-                             Control_1_Name=f"Thermostat_{zone_name}")
-
-            
-            idf.newidfobject("SCHEDULE:COMPACT", Name="AlwaysOn", Schedule_Type_Limits_Name="Fraction",
-                             Field_1="Through: 12/31", Field_2="For: AllDays", Field_3="Until: 24:00", Field_4="1.0")
-
-            infiltration_qv = material_defs.get(archetype_id, {}).get("Infiltration", 0)
-            idf.newidfobject("ZONEINFILTRATION:DESIGNFLOWRATE", Name=f"Infil_{zone_name}",
-                             Zone_or_ZoneList_or_Space_or_SpaceList_Name=zone_name, Schedule_Name="AlwaysOn",
-                             Design_Flow_Rate_Calculation_Method="Flow/Area", Flow_Rate_per_Floor_Area=infiltration_qv)
-
-            # WINDOW OBJECTS 
-            
-            for mat in materials:
-                if "Window ID" in mat:
-                    idf.newidfobject("WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM", Name=mat["Window ID"],
-                                     UFactor=mat["U_Factor"], Solar_Heat_Gain_Coefficient=mat["SHGC"],
-                                     Visible_Transmittance=0.6)
-
-
-            MIN_WALL_WIDTH = 1.5
-            MIN_WALL_HEIGHT = 1.5
-            aspect = 1.6  # Target aspect ratio (width:height)
-
-            for i, surface in enumerate(surfaces):
-                coords = surface["Coordinates"][0]  # outer ring only
-                coords_3d = [(x / 1000, y / 1000, z / 1000) for x, y, z in coords]
-                surface_type = surface["Type"]
-                surf_name = f"{surface_type}_{i}"
-                surf_map = {'G': 'Floor', 'R': 'Roof', 'F': 'Wall'}
-                bc_map = {'G': 'Ground', 'R': 'Outdoors', 'F': 'Outdoors'}
-                if surface_type not in surf_map:
-                    continue
-
-                outside_bc = bc_map[surface_type]
-                sun_exp, wind_exp = exposure_flags(outside_bc)
-
-                if surface_type == "F":
-                    boundary_cond = surface.get("BoundaryCondition", "EXPOSED")
-                    if boundary_cond.upper() == "ADIABATIC":
-                        outside_bc = "Adiabatic"
-                        sun_exp = "NoSun"
-                        wind_exp = "NoWind"
-
-                idf_surface = idf.newidfobject(
-                    "BUILDINGSURFACE:DETAILED",
-                    Name=surf_name,
-                    Surface_Type=surf_map[surface_type],
-                    Construction_Name=f"C_{surface_type}",
-                    Zone_Name=zone_name,
-                    Outside_Boundary_Condition=outside_bc,
-                    Sun_Exposure=sun_exp,
-                    Wind_Exposure=wind_exp,
-                    View_Factor_to_Ground=0.5,
-                    Number_of_Vertices=len(coords_3d)
-                )
-                for j, (x, y, z) in enumerate(coords_3d):
-                    idf_surface[f"Vertex_{j+1}_Xcoordinate"] = x
-                    idf_surface[f"Vertex_{j+1}_Ycoordinate"] = y
-                    idf_surface[f"Vertex_{j+1}_Zcoordinate"] = z
-
-                # generate window geometry for surface types F
-                if (
-                    surface_type == "F"
-                    and surface.get("BoundaryCondition", "EXPOSED").upper() == "EXPOSED"
-                    and len(coords_3d) == 4
-                ):
-                    p = np.array(coords_3d)
-                    v1 = p[1] - p[0]
-                    v2 = p[3] - p[0]
-                    wall_width = np.linalg.norm(v1)
-                    wall_height = np.linalg.norm(v2)
-
-                    if wall_width >= MIN_WALL_WIDTH and wall_height >= MIN_WALL_HEIGHT:
-                        archetype_wwr = material_defs.get(archetype_id, {}).get("WWR", 0.4)  # fallback 0.4
-                        wall_area = wall_width * wall_height
-                        archetype_wwr = material_defs.get(archetype_id, {}).get("WWR", 0.4)  # fallback 0.4
-                        desired_win_area = wall_area * float(archetype_wwr)
-
-                        # Compute max window size for target aspect that fits wall
-                        max_win_width = wall_width - 1e-4
-                        max_win_height = wall_height - 1e-4
-
-                        # 1. Start with target aspect and desired area
-                        win_height = (desired_win_area / aspect) ** 0.5
-                        win_width = win_height * aspect
-
-                        # 2. Fix to wall size, adjust aspect dynamically if needed
-                        if win_width > max_win_width:
-                            win_width = max_win_width
-                            win_height = win_width / aspect
-                        if win_height > max_win_height:
-                            win_height = max_win_height
-                            win_width = win_height * aspect
-
-                        # 3. If window still doesn't fit, reduce size (ignoring the aspect ratio) to max possible WWR
-                        if win_width > max_win_width or win_height > max_win_height:
-                            scale = min(max_win_width / win_width, max_win_height / win_height)
-                            win_width *= scale
-                            win_height *= scale
-
-                        # 4. (Optional) recalculate actual window area and WWR
-                        actual_win_area = win_width * win_height
-                        final_wwr = actual_win_area / wall_area
-                        # print(f"Surface {surf_name}: Final WWR={final_wwr:.2f}, Aspect={win_width/win_height:.2f}")
-
-                        # 5. Center window in wall
-                        offset1 = 0.5 - win_width / (2 * wall_width)
-                        offset2 = 0.5 - win_height / (2 * wall_height)
-                        o = p[0] + offset1 * v1 + offset2 * v2
-                        win_p1 = o
-                        win_p2 = o + win_width * v1 / wall_width
-                        win_p3 = o + win_width * v1 / wall_width + win_height * v2 / wall_height
-                        win_p4 = o + win_height * v2 / wall_height
-                        window_vertices = [win_p1, win_p2, win_p3, win_p4]
-
-                        # get window archetype from input data 
-                        window_construction = None
-                        for mat in materials:
-                            if "Window ID" in mat:
-                                window_construction = mat["Window ID"]
-                        if not window_construction:
-                            window_construction = "W.TI.1946"  # fallback if window archetype not found 
-
-                        window_constr = ensure_window_construction(idf, archetype_id, window_construction)
-
-                        idf.newidfobject(
-                            "FENESTRATIONSURFACE:DETAILED",
-                            Name=f"WIN_{surf_name}",
-                            Surface_Type="Window",
-                            Construction_Name=window_constr,
-                            Building_Surface_Name=surf_name,
-                            Number_of_Vertices=4,
-                            Vertex_1_Xcoordinate=window_vertices[0][0],
-                            Vertex_1_Ycoordinate=window_vertices[0][1],
-                            Vertex_1_Zcoordinate=window_vertices[0][2],
-                            Vertex_2_Xcoordinate=window_vertices[1][0],
-                            Vertex_2_Ycoordinate=window_vertices[1][1],
-                            Vertex_2_Zcoordinate=window_vertices[1][2],
-                            Vertex_3_Xcoordinate=window_vertices[2][0],
-                            Vertex_3_Ycoordinate=window_vertices[2][1],
-                            Vertex_3_Zcoordinate=window_vertices[2][2],
-                            Vertex_4_Xcoordinate=window_vertices[3][0],
-                            Vertex_4_Ycoordinate=window_vertices[3][1],
-                            Vertex_4_Zcoordinate=window_vertices[3][2]
-                        )
-
-            # OUTPUTS
-
-            idf.newidfobject("OUTPUT:VARIABLE", Key_Value="*",
-                             Variable_Name="Zone Ideal Loads Supply Air Total Heating Energy",
-                             Reporting_Frequency="Hourly")
-            idf.newidfobject("OUTPUT:VARIABLE", Key_Value="*",
-                             Variable_Name="Zone Ideal Loads Supply Air Total Cooling Energy",
-                             Reporting_Frequency="Hourly")
-
+            building_name, idf = build_idf(pand_id, entry)
             save_idf(idf, f"{building_name}.idf")
         return 1  # success, one IDF written
     except Exception as e:
@@ -404,7 +517,7 @@ def process_file(json_path):
 if __name__ == '__main__':
     files = [os.path.join(input_dir, f) for f in os.listdir(input_dir) if f.endswith('.json')]
     n_workers = max(1, cpu_count() - 1)
-    print(f"Processing {len(files)} files with {n_workers} workers...")
+    print(f"Processing {len(files)} files with {n_workers} workers (output profile: {OUTPUT_PROFILE}, fidelity: {FIDELITY})...")
 
     start_time = time.time()
     with Pool(processes=n_workers) as pool:
@@ -420,6 +533,9 @@ if __name__ == '__main__':
     with open(log_file, "w") as f:
         f.write(f"IDF generation summary\n")
         f.write(f"Total IDFs created: {num_idfs}\n")
+        f.write(f"Output profile: {OUTPUT_PROFILE} ({PROFILES[OUTPUT_PROFILE]['frequency']})\n")
+        f.write(f"Fidelity profile: {FIDELITY}\n")
+        f.write(f"Coplanar wall merge: {MERGE_COPLANAR} (tolerance {MERGE_TOLERANCE})\n")
         f.write(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)\n")
 
     print(f"log file saved to: {log_file}")
\ No newline at end of file
@@ -2,22 +2,32 @@
 batch run energyplus simulations
 for thousands of input IDF files
 use multiprocessing to speed up simulation process
+jobs are dispatched largest first, with per job timeout / retries and a streamed record per job
 """
 
-import os, shutil, subprocess, tempfile, time
+import json, os, shutil, subprocess, tempfile, time
+from collections import defaultdict
 from multiprocessing import Pool, cpu_count
 from pathlib import Path
 
+from tqdm import tqdm
 
-idf_folder   = Path(r"C:\idf_21")
-output_root  = Path(r"C:\sims_21")
-log_file     = output_root / "ep_log_21.txt"
+from sim_cache import ResultCache, cache_keys
+
+
+sims_root    = Path(r"C:\3_ep_sims")
+log_file     = sims_root / "ep_log_21.txt"
+records_file = sims_root / "ep_records_21.jsonl"   # one completion record per job, streamed
 
 eplus_exe    = Path(r"C:\EnergyPlusV24-2-0\energyplus.exe")
 
 
 """
-# update epw weather file per scenario (2020, 2050, 2080)
+scenario = IDF variant (A base / B retrofit) x weather year (2020, 2050, 2080)
+every IDF of a variant is simulated once per weather file, results in sims_root/<scenario>/sims_21/<pand>
+
+the rotterdam / debilt base IDF files only differ in Site:Location, with a weather file
+run period EnergyPlus uses the location of the EPW, so one IDF serves all weather files
 
 inputs files:
 
@@ -26,11 +36,75 @@ MET_DeBilt_TMY_2050.epw
 MET_DeBilt_TMY_2080.epw
 
 """
-# B1 retrofit / 2020 (ROTTERDAM BASE FILE)
 
-epw_path     = Path(r"C:\NLD_ZH_Rotterdam_TMY_2009-2023.epw")
+# one IDF set per variant, shared by all weather files
+VARIANTS = {
+    "A_base":  Path(r"C:\2_idf_files\A_base\idf_21"),
+    "B_retro": Path(r"C:\2_idf_files\B_retro\idf_21"),
+}
+
+WEATHER = {
+    "2020": Path(r"C:\NLD_ZH_Rotterdam_TMY_2009-2023.epw"),
+    "2050": Path(r"C:\MET_DeBilt_TMY_2050.epw"),
+    "2080": Path(r"C:\MET_DeBilt_TMY_2080.epw"),
+}
+
+# scenario: (variant, weather year)
+SCENARIOS = {
+    "A1_base_2020":  ("A_base",  "2020"),
+    "A2_base_2050":  ("A_base",  "2050"),
+    "A3_base_2080":  ("A_base",  "2080"),
+    "B1_retro_2020": ("B_retro", "2020"),
+    "B2_retro_2050": ("B_retro", "2050"),
+    "B3_retro_2080": ("B_retro", "2080"),
+}
+
+RUN_SCENARIOS = list(SCENARIOS)   # scenarios simulated by main()
+
+def scenario_root(scenario: str, index=21) -> Path:
+    return sims_root / scenario / f"sims_{index}"
+
+def scenario_idf_folder(scenario: str) -> Path:
+    return VARIANTS[SCENARIOS[scenario][0]]
+
+def scenario_weather(scenario: str) -> Path:
+    return WEATHER[SCENARIOS[scenario][1]]
+
+for scenario in SCENARIOS:
+    scenario_root(scenario).mkdir(parents=True, exist_ok=True)
+
+# default scenario, used by the single scenario scripts (4_generate_and_run, 8_benchmark_fidelity, 10_run_EP_async)
+
+DEFAULT_SCENARIO = "B1_retro_2020"
+idf_folder   = scenario_idf_folder(DEFAULT_SCENARIO)
+epw_path     = scenario_weather(DEFAULT_SCENARIO)
+output_root  = scenario_root(DEFAULT_SCENARIO)
+
+"""
+deduplicate buildings with identical canonical geometry / archetype / weather
+results are reused from the persistent cache instead of simulating again
+"""
+
+USE_CACHE    = True
+cache_root   = Path(r"C:\sim_cache")
+
+"""
+scheduling: largest buildings first (cost estimated from surface / window counts),
+one job at a time per worker so no worker idles while another holds a long chunk
+"""
+
+JOB_TIMEOUT  = 3600     # s per EnergyPlus run, None for no limit
+MAX_RETRIES  = 1        # extra attempts after a timeout / OS error
+RETRY_ON_ERROR = False  # EnergyPlus errors are deterministic, retrying them only costs time
+
+"""
+execution backend
+"subprocess": energyplus.exe per building, hourly results in eplusout.eso
+"api":        in-process pyenergyplus in long-lived workers (ep_api_backend.py),
+              no ESO, hourly results in eplusout_hourly.npz
+"""
 
-output_root.mkdir(parents=True, exist_ok=True)
+BACKEND      = "subprocess"
 
 
 """
@@ -38,7 +112,18 @@ ensure all files that are not .eso / .err.
 already implemted in IDF generation, but included as safety.
 """
 
-KEEP = {"eplusout.eso", "eplusout.err"}
+KEEP = {"eplusout.eso", "eplusout.err", "eplusout_hourly.npz"}
+
+# files read as results downstream, removed when a run fails / times out so a partial
+# ESO of a killed run can never be taken for a finished one (eplusout.err stays for triage)
+RESULT_FILES = ("eplusout.eso", "eplusout_hourly.npz")
+
+def needs_expandobjects(idf_file: Path) -> bool:
+    """
+    Only IDFs that still contain HVACTemplate objects need the ExpandObjects pre-processor,
+    IDFs written with WRITE_IDEAL_LOADS already hold the expanded objects.
+    """
+    return "HVACTEMPLATE" in Path(idf_file).read_text(errors="replace").upper()
 
 def keep_only_eso_err(folder: Path) -> None:
 
@@ -49,50 +134,199 @@ def keep_only_eso_err(folder: Path) -> None:
             except Exception as exc:
                 print(f"[WARNING] Could not delete {fp.name}: {exc}")
 
+def discard_results(folder: Path) -> None:
+
+    for name in RESULT_FILES:
+        try:
+            (folder / name).unlink(missing_ok=True)
+        except Exception as exc:
+            print(f"[WARNING] Could not delete {name}: {exc}")
+
 # run energyplus simulations per building (pand id)                
 
-def run_simulation(idf_file: str) -> int:
+def run_energyplus(work_dir, pand_output: Path, weather: Path = epw_path,
+                   timeout=JOB_TIMEOUT) -> str:
+    """
+    Run the in.idf found in work_dir, results are written to pand_output.
+    Returns "ok", "failed" or "timeout", result files are only left in pand_output for "ok".
+    """
+    if BACKEND == "api":
+        import ep_api_backend
+        ep_api_backend.eplus_dir = eplus_exe.parent
+        status = ep_api_backend.run_in_process(Path(work_dir, "in.idf"), weather, pand_output, timeout)
+        if status == "ok":
+            keep_only_eso_err(pand_output)
+        else:
+            discard_results(pand_output)
+        return status
+
+    cmd = [
+        str(eplus_exe),
+        "--weather",    str(weather),
+        "--output-directory", str(pand_output),
+        "--annual",
+        "in.idf",
+    ]
+    if needs_expandobjects(Path(work_dir, "in.idf")):
+        cmd.insert(-1, "--expandobjects")
+    try:
+        subprocess.run(cmd, cwd=work_dir, check=True, stdout=subprocess.PIPE,
+                       stderr=subprocess.STDOUT, text=True, timeout=timeout)
+        keep_only_eso_err(pand_output)
+        return "ok"
+    except subprocess.CalledProcessError as e:
+        (pand_output / "python_subprocess.log").write_text(e.stdout)
+        discard_results(pand_output)
+        return "failed"
+    except subprocess.TimeoutExpired:
+        (pand_output / "python_subprocess.log").write_text(f"timeout after {timeout} s\n")
+        discard_results(pand_output)
+        return "timeout"
+
+def run_in_dir(work_dir, pand_output: Path, weather: Path = epw_path) -> int:
+    return int(run_energyplus(work_dir, pand_output, weather) == "ok")
+
+def run_job(job: tuple) -> dict:
+    """
+    Simulate one (IDF, scenario) pair with retries, returns a completion record.
+    """
+    idf_file, scenario = job
     pand_name   = Path(idf_file).stem
-    pand_output = output_root / pand_name
+    pand_output = scenario_root(scenario) / pand_name
     pand_output.mkdir(exist_ok=True)
 
-    with tempfile.TemporaryDirectory() as td:
-        shutil.copy(idf_file, Path(td, "in.idf"))
-
-        cmd = [
-            str(eplus_exe),
-            "--weather",    str(epw_path),
-            "--output-directory", str(pand_output),
-            "--annual",
-            "--expandobjects",
-            "in.idf",
-        ]
-        try:
-            subprocess.run(cmd, cwd=td, check=True, stdout=subprocess.PIPE,
-                           stderr=subprocess.STDOUT, text=True)
-            keep_only_eso_err(pand_output)
-            return 1  # Success
-        except subprocess.CalledProcessError as e:
-            (pand_output / "python_subprocess.log").write_text(e.stdout)
-            return 0  # Failure
+    start = time.time()
+    attempts = 0
+    while True:
+        attempts += 1
+        with tempfile.TemporaryDirectory() as td:
+            shutil.copy(idf_file, Path(td, "in.idf"))
+            try:
+                status = run_energyplus(td, pand_output, weather=scenario_weather(scenario))
+            except OSError as exc:
+                (pand_output / "python_subprocess.log").write_text(str(exc))
+                discard_results(pand_output)
+                status = "error"
+        retry = status in ("timeout", "error") or (status == "failed" and RETRY_ON_ERROR)
+        if status == "ok" or not retry or attempts > MAX_RETRIES:
+            break
+
+    return {"pand": pand_name, "scenario": scenario, "status": status, "attempts": attempts,
+            "seconds": round(time.time() - start, 1), "finished": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+def run_simulation(idf_file: str, scenario: str = DEFAULT_SCENARIO) -> int:
+    return int(run_job((idf_file, scenario))["status"] == "ok")
+
+# scheduling
+
+def estimate_cost(idf_file: str) -> int:
+    """
+    Relative run time of an IDF: shading / radiation exchange grows with
+    surfaces x (surfaces + windows).
+    """
+    text = Path(idf_file).read_text(errors="replace").upper()
+    n_surfaces = text.count("BUILDINGSURFACE:DETAILED,")
+    n_windows  = text.count("FENESTRATIONSURFACE:DETAILED,")
+    return n_surfaces * (n_surfaces + n_windows)
+
+def run_scheduled(pool, jobs: list) -> dict:
+    """
+    Longest job first with dynamic assignment, completion records are appended
+    to records_file as they arrive. jobs are (idf_file, scenario) pairs,
+    returns {(idf_file, scenario): 1 / 0}.
+    """
+    idfs = sorted({idf_file for idf_file, _ in jobs})
+    costs = dict(zip(idfs, pool.map(estimate_cost, idfs, chunksize=50)))
+    order = sorted(jobs, key=lambda job: costs[job[0]], reverse=True)
+    # the variants share building names, a record is matched by (pand, scenario)
+    by_name = {(Path(f).stem, scenario): f for f, scenario in jobs}
+
+    results = {}
+    with open(records_file, "a") as rec, tqdm(total=len(order), desc="simulations") as pbar:
+        for record in pool.imap_unordered(run_job, order, chunksize=1):
+            idf_file = by_name[(record["pand"], record["scenario"])]
+            record["cost"] = costs[idf_file]
+            rec.write(json.dumps(record) + "\n")
+            rec.flush()
+            results[(idf_file, record["scenario"])] = int(record["status"] == "ok")
+            pbar.update(1)
+            pbar.set_postfix(failed=len(results) - sum(results.values()))
+    return results
+
+# cached runs
+
+def run_with_cache(pool, jobs: list) -> tuple:
+    """
+    Group (IDF, scenario) jobs by cache key, restore cache hits and simulate one job per new key.
+    Returns ({(idf_file, scenario): 1 / 0}, number of cache hits), 1 for a restored hit or a successful run.
+    """
+    cache = ResultCache(cache_root)
+    scenarios_of = defaultdict(list)
+    for idf_file, scenario in jobs:
+        scenarios_of[idf_file].append(scenario)
+    idfs = sorted(scenarios_of)
+    # one IDF parse for all weather files of an IDF
+    keys_per_idf = pool.starmap(cache_keys, [(idf_file, [scenario_weather(s) for s in scenarios_of[idf_file]])
+                                             for idf_file in idfs], chunksize=20)
+    keys = {(idf_file, s): key for idf_file, keys in zip(idfs, keys_per_idf)
+            for s, key in zip(scenarios_of[idf_file], keys)}
+
+    def output_of(job):
+        return scenario_root(job[1]) / Path(job[0]).stem
+
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[keys[job]].append(job)
+
+    status = {}
+    num_hits = 0
+    to_run = []
+    for key, members in groups.items():
+        if cache.has(key):
+            for job in members:
+                status[job] = int(cache.restore(key, output_of(job)))
+            num_hits += len(members)
+        else:
+            to_run.append(key)
+
+    print(f"{len(groups)} unique simulations, {num_hits} cache hits, {len(to_run)} to simulate")
+
+    results = run_scheduled(pool, [groups[key][0] for key in to_run])
+    for key in to_run:
+        first, *others = groups[key]
+        status[first] = results[first]
+        if not results[first]:
+            status.update({job: 0 for job in others})
+            continue
+        cache.put(key, output_of(first), source=f"{first[1]}/{Path(first[0]).stem}")
+        for job in others:
+            status[job] = int(cache.restore(key, output_of(job)))
+            num_hits += 1
+    return status, num_hits
 
 def main() -> None:
-    idfs = [str(p) for p in idf_folder.glob("*.idf")]
-    if not idfs:
+    jobs = [(str(p), scenario) for scenario in RUN_SCENARIOS
+            for p in scenario_idf_folder(scenario).glob("*.idf")]
+    if not jobs:
         print("No IDF files found – nothing to simulate.")
         return
 
     n_workers = max(1, cpu_count()-1)
-    print(f"Running {len(idfs)} IDFs using {n_workers} workers …")
+    print(f"Running {len(jobs)} jobs ({len(RUN_SCENARIOS)} scenarios) using {n_workers} workers …")
 
     start_time = time.time()
+    num_hits = 0
     with Pool(n_workers) as pool:
-        results = pool.map(run_simulation, idfs)
+        if USE_CACHE:
+            status, num_hits = run_with_cache(pool, jobs)
+        else:
+            status = run_scheduled(pool, jobs)
+    num_success = sum(status.values())
     elapsed = time.time() - start_time
 
-    num_success = sum(results)
-    num_total = len(results)
+    num_total = len(jobs)
     print(f"\nSimulations completed: {num_success} / {num_total} successful")
+    print(f"Reused from cache: {num_hits}")
     print(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)")
 
     # write log file
@@ -100,9 +334,11 @@ def main() -> None:
         f.write("EnergyPlus simulation summary\n")
         f.write(f"Total simulations attempted: {num_total}\n")
         f.write(f"Successful simulations:     {num_success}\n")
+        f.write(f"Reused from cache:          {num_hits}\n")
         f.write(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)\n")
 
     print(f"Log file written to: {log_file}")
+    print(f"Job records appended to: {records_file}")
 
 # run
 
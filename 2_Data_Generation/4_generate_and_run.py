@@ -0,0 +1,185 @@
+"""
+streaming generate -> simulate pipeline
+IDF models go straight from the generator processes into a bounded queue
+that feeds the EnergyPlus workers, no intermediate IDF files are saved.
+simulation starts as soon as the first model is generated.
+
+- generator / simulation settings (materials, base IDF, EPW, EnergyPlus) are taken
+  from 2_generate_IDF.py and 3_run_EP.py
+- each run works in a temp dir on tmpfs (RAM) where available, only
+  eplusout.eso / eplusout.err are moved to the output folder
+- KEEP_FAILED keeps the IDF + EnergyPlus output of failed runs for debugging
+"""
+
+import importlib
+import json
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from multiprocessing import Process, Queue, cpu_count
+from pathlib import Path
+
+from tqdm import tqdm
+
+from sim_cache import ResultCache, cache_key
+
+gen = importlib.import_module("2_generate_IDF")
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+input_dir   = gen.input_dir
+output_root = ep.output_root
+epw_path    = ep.epw_path
+failed_dir  = Path(r"C:\sims_21_failed")
+log_file    = output_root / "pipeline_log_21.txt"
+
+# linux tmpfs, on windows point this to a RAM disk or leave None (system temp dir)
+WORK_ROOT = Path("/dev/shm") if Path("/dev/shm").is_dir() else None
+
+KEEP_FAILED = True
+
+N_GENERATORS = 2                                  # eppy generation is ~100x faster than simulation
+N_SIMULATORS = max(1, cpu_count() - 1 - N_GENERATORS)
+QUEUE_SIZE   = 2 * N_SIMULATORS                   # bounded, generators wait when simulators fall behind
+POLL_SECONDS = 10                                 # result wait before checking for crashed simulators
+
+# workers
+
+def generator_worker(task_q: Queue, model_q: Queue) -> None:
+    for json_path in iter(task_q.get, None):
+        try:
+            with open(json_path, "r") as f:
+                surface_data = json.load(f)
+            for pand_id, entry in surface_data.items():
+                building_name, idf = gen.build_idf(pand_id, entry)
+                model_q.put((building_name, idf.idfstr()))
+        except Exception as e:
+            print(f"Error generating IDF from {json_path}: {e}")
+
+def simulate(building_name: str, idf_str: str, cache) -> int:
+    pand_output = output_root / building_name
+
+    with tempfile.TemporaryDirectory(dir=WORK_ROOT) as td:
+        idf_file = Path(td, "in.idf")
+        idf_file.write_text(idf_str)
+
+        key = None
+        if cache is not None:
+            key = cache_key(idf_file, epw_path)
+            if cache.restore(key, pand_output):
+                return 1
+
+        run_output = Path(td, "out")
+        run_output.mkdir()
+        ok = ep.run_in_dir(td, run_output, weather=epw_path)
+
+        if ok:
+            pand_output.mkdir(parents=True, exist_ok=True)
+            for name in ep.KEEP:
+                if (run_output / name).exists():
+                    shutil.move(str(run_output / name), pand_output / name)
+            if cache is not None:
+                cache.put(key, pand_output, source=building_name)
+        elif KEEP_FAILED:
+            keep = failed_dir / building_name
+            shutil.copytree(run_output, keep, dirs_exist_ok=True)
+            shutil.copy(idf_file, keep / f"{building_name}.idf")
+        return ok
+
+def simulation_worker(model_q: Queue, result_q: Queue) -> None:
+    cache = ResultCache(ep.cache_root) if ep.USE_CACHE else None
+    for building_name, idf_str in iter(model_q.get, None):
+        try:
+            ok = simulate(building_name, idf_str, cache)
+        except Exception as e:
+            print(f"Error simulating {building_name}: {e}")
+            ok = 0
+        result_q.put((building_name, ok))
+    result_q.put(None)
+
+# main
+
+def main() -> None:
+    files = [str(p) for p in Path(input_dir).glob("*.json")]
+    if not files:
+        print("No JSON files found – nothing to generate.")
+        return
+    if KEEP_FAILED:
+        failed_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Streaming {len(files)} files: {N_GENERATORS} generators -> {N_SIMULATORS} simulators "
+          f"(queue {QUEUE_SIZE}, work dir {WORK_ROOT or tempfile.gettempdir()})")
+
+    task_q, model_q, result_q = Queue(), Queue(maxsize=QUEUE_SIZE), Queue()
+    for fp in files:
+        task_q.put(fp)
+    for _ in range(N_GENERATORS):
+        task_q.put(None)
+
+    start_time = time.time()
+    generators = [Process(target=generator_worker, args=(task_q, model_q)) for _ in range(N_GENERATORS)]
+    simulators = [Process(target=simulation_worker, args=(model_q, result_q)) for _ in range(N_SIMULATORS)]
+    for p in generators + simulators:
+        p.start()
+
+    # once all models are generated, tell the simulators to stop
+    def close_models():
+        for p in generators:
+            p.join()
+        for _ in range(N_SIMULATORS):
+            model_q.put(None)
+    threading.Thread(target=close_models, daemon=True).start()
+
+    num_success = num_total = 0
+    first_done = None
+    finished = 0
+    dead = []
+    # total unknown: a json file holds any number of buildings
+    with tqdm(desc="simulated", unit="building") as pbar:
+        while finished + len(dead) < N_SIMULATORS:
+            try:
+                item = result_q.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                # a simulator killed hard (OOM / segfault) never sends its None
+                dead = [p for p in simulators if p.exitcode not in (None, 0)]
+                continue
+            if item is None:
+                finished += 1
+                continue
+            if first_done is None:
+                first_done = time.time() - start_time
+            num_total += 1
+            num_success += item[1]
+            pbar.update(1)
+
+    for p in simulators:
+        p.join()
+    if dead:
+        # nobody is left to take models, generators blocked on the full queue are stopped
+        for p in generators:
+            if p.is_alive():
+                p.terminate()
+    elapsed = time.time() - start_time
+
+    print(f"\nSimulations completed: {num_success} / {num_total} successful")
+    if dead:
+        print(f"[WARNING] {len(dead)} simulator(s) crashed (exit codes {[p.exitcode for p in dead]}), "
+              f"their running buildings have no result")
+    if first_done is not None:
+        print(f"First result after: {first_done:.1f} seconds")
+    print(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)")
+
+    with open(log_file, "w") as f:
+        f.write("Generate + EnergyPlus pipeline summary\n")
+        f.write(f"Total simulations attempted: {num_total}\n")
+        f.write(f"Successful simulations:     {num_success}\n")
+        f.write(f"Crashed simulators:         {len(dead)}\n")
+        f.write(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)\n")
+
+    print(f"Log file written to: {log_file}")
+
+if __name__ == "__main__":
+    main()
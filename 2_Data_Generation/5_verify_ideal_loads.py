@@ -0,0 +1,107 @@
+"""
+verify the ideal loads objects written by 2_generate_IDF.py (WRITE_IDEAL_LOADS)
+against the output of the EnergyPlus ExpandObjects pre-processor
+
+for a random sample of buildings:
+- build the model twice: with HVACTEMPLATE:ZONE:IDEALLOADSAIRSYSTEM and with the expanded objects
+- run ExpandObjects on the template version
+- diff the full object sets (field values compared case-insensitive / numerically)
+rerun after EnergyPlus version updates, the template defaults can change
+"""
+
+import importlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from idf_text import parse_idf, read_idf
+
+gen = importlib.import_module("2_generate_IDF")
+
+# paths
+
+input_dir  = gen.input_dir
+eplus_dir  = Path(r"C:\EnergyPlusV24-2-0")
+report_file = Path(r"C:\ideal_loads_check_21.txt")
+
+expand_exe = eplus_dir / ("ExpandObjects.exe" if os.name == "nt" else "ExpandObjects")
+
+N_SAMPLE = 20
+SEED = 42
+
+# helpers
+
+def normalise(obj) -> tuple:
+    """
+    Comparable form of an IDF object: upper case, numbers as floats, no trailing blanks.
+    """
+    fields = []
+    for f in obj:
+        try:
+            fields.append(round(float(f), 6))
+        except ValueError:
+            fields.append(f.upper())
+    while fields and fields[-1] == "":
+        fields.pop()
+    return tuple(fields)
+
+def expand(template_idf_str: str) -> list:
+    """
+    Run ExpandObjects on one IDF, return the objects of expanded.idf.
+    """
+    with tempfile.TemporaryDirectory() as td:
+        Path(td, "in.idf").write_text(template_idf_str)
+        shutil.copy(eplus_dir / "Energy+.idd", Path(td, "Energy+.idd"))
+        subprocess.run([str(expand_exe)], cwd=td, check=True,
+                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        expanded = Path(td, "expanded.idf")
+        # ExpandObjects writes no expanded.idf when there was nothing to expand
+        return read_idf(expanded) if expanded.exists() else parse_idf(template_idf_str)
+
+def diff_building(pand_id, entry) -> list:
+    _, template_idf = gen.build_idf(pand_id, entry, ideal_loads=False)
+    _, direct_idf = gen.build_idf(pand_id, entry, ideal_loads=True)
+
+    expanded = Counter(normalise(o) for o in expand(template_idf.idfstr()))
+    direct = Counter(normalise(o) for o in parse_idf(direct_idf.idfstr()))
+
+    issues = []
+    for obj in sorted((expanded - direct).elements(), key=str):
+        issues.append(f"  only in ExpandObjects output: {obj}")
+    for obj in sorted((direct - expanded).elements(), key=str):
+        issues.append(f"  only in generated IDF:        {obj}")
+    return issues
+
+# main
+
+if __name__ == "__main__":
+    files = sorted(Path(input_dir).glob("*.json"))
+    random.seed(SEED)
+    sample = random.sample(files, min(N_SAMPLE, len(files)))
+    print(f"Checking {len(sample)} buildings against {expand_exe} …")
+
+    lines = []
+    n_ok = n_total = 0
+    for fp in sample:
+        with open(fp, "r") as f:
+            surface_data = json.load(f)
+        for pand_id, entry in surface_data.items():
+            issues = diff_building(pand_id, entry)
+            n_total += 1
+            if issues:
+                lines.append(f"{pand_id}: {len(issues)} differences")
+                lines.extend(issues)
+            else:
+                n_ok += 1
+                lines.append(f"{pand_id}: identical")
+
+    with open(report_file, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    print(f"Identical models: {n_ok} / {n_total}")
+    print(f"Report written to: {report_file}")
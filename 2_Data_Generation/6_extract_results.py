@@ -0,0 +1,107 @@
+"""
+extract annual / monthly heating and cooling demand from the EnergyPlus results
+of thousands of simulations (eplusout.eso, or eplusout_hourly.npz from the api backend)
+
+per building:
+- annual heating / cooling [kWh]
+- monthly heating / cooling [kWh]
+- peak hourly heating / cooling [W]
+what is available follows the output profile the IDFs were generated with (output_profiles.py):
+monthly values need the monthly / daily / hourly profile, peaks the hourly profile (NaN otherwise)
+
+results are read where 3_run_EP.py writes them: <sims_root>/<scenario>/sims_{idx}/Pand.<id>
+output per scenario and index: <scenario>/demand_{idx}.json ("buildings" list) + demand_{idx}.csv
+unfinished runs (ESO without "End of Data" / incomplete run period) get no row,
+they are listed in <scenario>/extract_log_{idx}.txt
+input for the demand analysis (normalising per floor area, energy labels -> clean_labels_{idx}.json)
+"""
+
+import importlib
+import json
+import time
+import concurrent.futures
+from pathlib import Path
+
+import pandas as pd
+from tqdm import tqdm
+
+from eso_reader import COOLING, HEATING, read_results, summarise
+
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+INDEXES = [6, 7, 8, 21]
+SCENARIOS = list(ep.SCENARIOS)          # ep.scenario_root(scenario, idx)/Pand.<id>/eplusout.eso
+ROOT_OUTPUT = Path(r"C:\demand_out")
+
+ROOT_OUTPUT.mkdir(parents=True, exist_ok=True)
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+def extract_building(folder: Path):
+    """
+    Returns (row dict, None) or (None, error message).
+    """
+    pand_id = folder.name.split(".")[-1]
+    try:
+        series = read_results(folder)
+        if HEATING not in series or COOLING not in series:
+            return None, f"{pand_id}: heating / cooling variables not found"
+
+        heat = summarise(series[HEATING])
+        cool = summarise(series[COOLING])
+        nan_months = [float("nan")] * 12
+        row = {
+            "Pand ID": pand_id,
+            "Frequency": series[HEATING]["frequency"],
+            "Annual Heating": round(heat["annual"], 4),
+            "Annual Cooling": round(cool["annual"], 4),
+            "Total Demand": round(heat["annual"] + cool["annual"], 4),
+            "Peak Heating": round(heat["peak"], 2) if heat["peak"] is not None else float("nan"),
+            "Peak Cooling": round(cool["peak"], 2) if cool["peak"] is not None else float("nan"),
+        }
+        for label, res in (("Heating", heat), ("Cooling", cool)):
+            monthly = res["monthly"] if res["monthly"] is not None else nan_months
+            row.update({f"{label} {m}": round(float(v), 4) for m, v in zip(MONTHS, monthly)})
+        return row, None
+    except Exception as e:
+        return None, f"{pand_id}: {e}"
+
+def process_index(scenario, idx):
+    sims_dir = ep.scenario_root(scenario, idx)
+    if not sims_dir.is_dir():
+        print(f"{sims_dir} not found, skipped")
+        return
+    folders = [p for p in sims_dir.iterdir() if p.is_dir()]
+    out_dir = ROOT_OUTPUT / scenario
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    rows, log = [], []
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        for row, error in tqdm(executor.map(extract_building, folders, chunksize=50),
+                               total=len(folders), desc=f"{scenario} sims_{idx}"):
+            if row:
+                rows.append(row)
+            else:
+                log.append(error)
+
+    json_path = out_dir / f"demand_{idx}.json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"buildings": rows}, f)
+    pd.DataFrame(rows).to_csv(out_dir / f"demand_{idx}.csv", index=False)
+
+    if log:
+        log_path = out_dir / f"extract_log_{idx}.txt"
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log) + "\n")
+        print(f"{len(log)} issues logged to {log_path}")
+    print(f"{scenario} sims_{idx}: {len(rows)} buildings -> {json_path}")
+
+if __name__ == "__main__":
+    start_time = time.time()
+    for scenario in SCENARIOS:
+        for idx in INDEXES:
+            process_index(scenario, idx)
+    elapsed = time.time() - start_time
+    print(f"Total time: {elapsed:.1f} seconds ({elapsed/60:.2f} min)")
@@ -0,0 +1,83 @@
+"""
+pack the hourly heating / cooling results of every building into one
+columnar store per scenario (see hourly_store.py)
+replaces keeping 20k eplusout.eso text files per scenario for downstream use
+
+<sims_root>/<scenario>/sims_<idx>/Pand.<id>/eplusout.eso (or eplusout_hourly.npz) -> <scenario>.zarr
+"""
+
+import concurrent.futures
+import importlib
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+from eso_reader import read_results
+from hourly_store import CHUNKS, HOURS, HourlyStore, VARIABLES, create_store
+
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+SCENARIOS = list(ep.SCENARIOS)     # ep.scenario_root(scenario, idx)/Pand.<id>
+INDEXES = [6, 7, 8, 21]
+ROOT_OUTPUT = Path(r"C:\3_hourly_store")
+
+ROOT_OUTPUT.mkdir(parents=True, exist_ok=True)
+
+def load_hourly(folder: Path):
+    """
+    (8760, n_variables) float32 array of one building, None if missing / incomplete.
+    """
+    try:
+        series = read_results(folder)
+        cols = [series[v]["values"] for v in VARIABLES]
+        if any(len(c) != HOURS for c in cols):
+            return None
+        return np.stack(cols, axis=1).astype(np.float32)
+    except Exception:
+        return None
+
+def build_store(scenario: str) -> None:
+    folders = []
+    for idx in INDEXES:
+        sims_dir = ep.scenario_root(scenario, idx)
+        if sims_dir.exists():
+            folders.extend(sorted(p for p in sims_dir.iterdir() if p.is_dir()))
+    if not folders:
+        print(f"{scenario}: no simulations found")
+        return
+
+    pand_ids = [f.name.split(".")[-1] for f in folders]
+    store_path = ROOT_OUTPUT / f"{scenario}.zarr"
+    array = create_store(store_path, pand_ids)
+
+    # write one chunk row (CHUNKS[0] buildings) at a time
+    block = CHUNKS[0]
+    buffer = np.full((block, HOURS, len(VARIABLES)), np.nan, dtype=np.float32)
+    missing = []
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        results = executor.map(load_hourly, folders, chunksize=block)
+        for i, data in enumerate(tqdm(results, total=len(folders), desc=scenario)):
+            if data is None:
+                missing.append(pand_ids[i])
+            else:
+                buffer[i % block] = data
+            if i % block == block - 1 or i == len(folders) - 1:
+                start = i - i % block
+                array[start:i + 1] = buffer[:i + 1 - start]
+                buffer[:] = np.nan
+
+    if missing:
+        with open(ROOT_OUTPUT / f"{scenario}_missing.txt", "w") as f:
+            f.write("\n".join(missing) + "\n")
+    print(f"{scenario}: {len(pand_ids) - len(missing)} / {len(pand_ids)} buildings -> {store_path}")
+
+if __name__ == "__main__":
+    for scenario in SCENARIOS:
+        build_store(scenario)
+
+    # quick check
+    store = HourlyStore(ROOT_OUTPUT / f"{SCENARIOS[0]}.zarr")
+    print(f"{SCENARIOS[0]}: {len(store)} buildings, variables {store.variables}")
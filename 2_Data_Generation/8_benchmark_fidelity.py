@@ -0,0 +1,129 @@
+"""
+benchmark the simulation fidelity profiles (FIDELITY_PROFILES in 2_generate_IDF.py)
+on a sample of buildings stratified per archetype
+
+every building is simulated once per profile, the jobs of all profiles are
+shuffled together so each profile sees the same machine load.
+reports per profile: speedup against "reference" and the error in annual
+heating / cooling against the reference results.
+"""
+
+import importlib
+import json
+import random
+import tempfile
+import time
+from collections import defaultdict
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from eso_reader import COOLING, HEATING, read_results, summarise
+
+gen = importlib.import_module("2_generate_IDF")
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+input_dir  = gen.input_dir
+bench_root = Path(r"C:\fidelity_benchmark_21")
+epw_path   = ep.epw_path
+
+N_PER_ARCHETYPE = 10
+SEED = 42
+REFERENCE = "reference"
+
+bench_root.mkdir(parents=True, exist_ok=True)
+
+# helpers
+
+def stratified_sample(files, n_per_archetype, seed) -> list:
+    """
+    Up to n buildings per Archetype ID.
+    """
+    by_archetype = defaultdict(list)
+    for fp in files:
+        with open(fp, "r") as f:
+            entry = next(iter(json.load(f).values()))
+        by_archetype[entry["Archetype ID"]].append(fp)
+
+    rng = random.Random(seed)
+    sample = []
+    for archetype in sorted(by_archetype):
+        members = sorted(by_archetype[archetype])
+        sample.extend(rng.sample(members, min(n_per_archetype, len(members))))
+    return sample
+
+def run_job(job) -> dict:
+    profile, json_path = job
+    with open(json_path, "r") as f:
+        pand_id, entry = next(iter(json.load(f).items()))
+    building_name, idf = gen.build_idf(pand_id, entry, output_profile="annual", fidelity=profile)
+
+    record = {"profile": profile, "Pand ID": building_name, "Archetype ID": entry["Archetype ID"]}
+    with tempfile.TemporaryDirectory() as td:
+        Path(td, "in.idf").write_text(idf.idfstr())
+        out = Path(td, "out")
+        out.mkdir()
+        start = time.time()
+        status = ep.run_energyplus(td, out, weather=epw_path, timeout=None)
+        record["seconds"] = time.time() - start
+        record["status"] = status
+        if status == "ok":
+            series = read_results(out)
+            record["Annual Heating"] = summarise(series[HEATING])["annual"]
+            record["Annual Cooling"] = summarise(series[COOLING])["annual"]
+    return record
+
+def summarise_profiles(df: pd.DataFrame) -> pd.DataFrame:
+    ok = df[df["status"] == "ok"]
+    ref = ok[ok["profile"] == REFERENCE].set_index("Pand ID")
+    rows = []
+    for profile in gen.FIDELITY_PROFILES:
+        cur = ok[ok["profile"] == profile].set_index("Pand ID")
+        common = cur.index.intersection(ref.index)
+        if common.empty:
+            continue
+        cur, r = cur.loc[common], ref.loc[common]
+        row = {
+            "profile": profile,
+            "buildings": len(common),
+            "total seconds": round(cur["seconds"].sum(), 1),
+            "speedup": round(r["seconds"].sum() / cur["seconds"].sum(), 2),
+            "median speedup": round(float(np.median(r["seconds"] / cur["seconds"])), 2),
+        }
+        for target in ("Annual Heating", "Annual Cooling"):
+            err = cur[target] - r[target]
+            pct = 100 * err.abs() / r[target].abs().where(r[target].abs() > 1e-9)
+            row[f"{target} MAE [kWh]"] = round(err.abs().mean(), 2)
+            row[f"{target} MAPE [%]"] = round(pct.mean(), 2)
+            row[f"{target} max APE [%]"] = round(pct.max(), 2)
+            row[f"{target} bias [%]"] = round(100 * err.sum() / r[target].sum(), 2)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+# main
+
+if __name__ == "__main__":
+    files = sorted(Path(input_dir).glob("*.json"))
+    sample = stratified_sample(files, N_PER_ARCHETYPE, SEED)
+    jobs = [(profile, str(fp)) for profile in gen.FIDELITY_PROFILES for fp in sample]
+    random.Random(SEED).shuffle(jobs)
+
+    n_workers = max(1, cpu_count() - 1)
+    print(f"Benchmarking {len(gen.FIDELITY_PROFILES)} profiles on {len(sample)} buildings "
+          f"({len(jobs)} runs, {n_workers} workers) …")
+
+    with Pool(n_workers) as pool:
+        records = list(tqdm(pool.imap_unordered(run_job, jobs), total=len(jobs)))
+
+    df = pd.DataFrame(records)
+    df.to_csv(bench_root / "fidelity_runs.csv", index=False)
+
+    summary = summarise_profiles(df)
+    summary.to_csv(bench_root / "fidelity_summary.csv", index=False)
+    print(summary.to_string(index=False))
+    print(f"\nResults written to: {bench_root}")
@@ -0,0 +1,135 @@
+"""
+run the EnergyPlus simulations of all scenarios from a shared job queue (sim_queue.py)
+start workers on as many machines as needed, each pulls (building, scenario) jobs
+until the queue is empty.
+
+    python 9_sim_queue.py submit         add all IDFs of SCENARIOS to the queue
+    python 9_sim_queue.py work           one worker in this process
+    python 9_sim_queue.py local 8        8 worker processes on this machine
+    python 9_sim_queue.py status         job counts per scenario / state
+    python 9_sim_queue.py reset-failed   put failed jobs back to pending
+"""
+
+import importlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Process, cpu_count
+from pathlib import Path
+
+from sim_queue import JobQueue, worker_name
+
+ep = importlib.import_module("3_run_EP")
+
+# paths
+
+queue_db = Path(r"C:\sim_queue.sqlite")   # local disk or shared filesystem with working locks
+
+# scenarios (IDF variant x weather file) of 3_run_EP.py
+SCENARIOS = {
+    scenario: {"idf_folder": ep.scenario_idf_folder(scenario),
+               "epw": ep.scenario_weather(scenario),
+               "output_root": ep.scenario_root(scenario)}
+    for scenario in ep.SCENARIOS
+}
+
+LEASE_SECONDS = 900      # a job is re-queued when its worker sends no heartbeat for this long
+MAX_ATTEMPTS  = 3
+POLL_SECONDS  = 30       # wait while other workers still hold jobs that may come back
+
+# submit
+
+def submit() -> None:
+    queue = JobQueue(queue_db, LEASE_SECONDS, MAX_ATTEMPTS)
+    for scenario, cfg in SCENARIOS.items():
+        idfs = sorted(cfg["idf_folder"].glob("*.idf"))
+        jobs = ({"scenario": scenario, "building": p.stem, "idf_path": p, "epw_path": cfg["epw"],
+                 "output_dir": cfg["output_root"] / p.stem, "cost": ep.estimate_cost(p)} for p in idfs)
+        added = queue.submit(jobs)
+        print(f"{scenario}: {added} new jobs ({len(idfs)} IDFs)")
+    queue.close()
+
+# worker
+
+def run_job(job: dict) -> str:
+    out_dir = Path(job["output_dir"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as td:
+        shutil.copy(job["idf_path"], Path(td, "in.idf"))
+        return ep.run_energyplus(td, out_dir, weather=Path(job["epw_path"]))
+
+def work() -> None:
+    queue = JobQueue(queue_db, LEASE_SECONDS, MAX_ATTEMPTS)
+    me = worker_name()
+    n_done = 0
+    while True:
+        job = queue.claim(me)
+        if job is None:
+            if queue.active() == 0:
+                break
+            time.sleep(POLL_SECONDS)
+            continue
+
+        # keep the lease alive while EnergyPlus runs (own connection per thread)
+        stop = threading.Event()
+        def beat():
+            hb = JobQueue(queue_db, LEASE_SECONDS, MAX_ATTEMPTS)
+            while not stop.wait(LEASE_SECONDS / 3):
+                if not hb.heartbeat(job["id"], me):
+                    print(f"[{me}] lost lease on {job['scenario']}/{job['building']}")
+                    break
+            hb.close()
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+
+        start = time.time()
+        try:
+            status = run_job(job)
+        except Exception as exc:
+            status = f"error: {exc}"
+        finally:
+            stop.set()
+            beater.join()
+        seconds = time.time() - start
+
+        if status == "ok":
+            queue.complete(job["id"], me, job["output_dir"], seconds)
+            n_done += 1
+        else:
+            # EnergyPlus errors are deterministic, only timeouts / OS errors are retried
+            queue.fail(job["id"], me, status, retry=status != "failed")
+    queue.close()
+    print(f"[{me}] queue empty, {n_done} jobs done")
+
+def status() -> None:
+    queue = JobQueue(queue_db, LEASE_SECONDS, MAX_ATTEMPTS)
+    for scenario, counts in sorted(queue.counts().items()):
+        print(f"{scenario:15s} " + "  ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+    queue.close()
+
+# main
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "work"
+    if mode == "submit":
+        submit()
+    elif mode == "work":
+        work()
+    elif mode == "local":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else max(1, cpu_count() - 1)
+        workers = [Process(target=work) for _ in range(n)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+        status()
+    elif mode == "status":
+        status()
+    elif mode == "reset-failed":
+        queue = JobQueue(queue_db, LEASE_SECONDS, MAX_ATTEMPTS)
+        print(f"{queue.reset_failed()} failed jobs re-queued")
+        queue.close()
+    else:
+        print(__doc__)
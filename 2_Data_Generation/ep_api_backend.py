@@ -0,0 +1,128 @@
+"""
+in-process EnergyPlus backend using the python API bundled with EnergyPlus (pyenergyplus)
+
+each worker process loads the EnergyPlus library once and re-uses one state
+(reset between runs), so there is no process start-up per building.
+heating / cooling ideal loads energy is collected through a runtime callback
+straight into numpy arrays (8760 x 2, J per hour), the IDF outputs are removed
+and no ESO is written. results are saved as eplusout_hourly.npz next to eplusout.err.
+
+select with BACKEND = "api" in 3_run_EP.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from idf_text import format_idf, parse_idf
+
+eplus_dir = Path(r"C:\EnergyPlusV24-2-0")
+
+RESULT_FILE = "eplusout_hourly.npz"
+VARIABLES = (
+    "Zone Ideal Loads Supply Air Total Heating Energy",
+    "Zone Ideal Loads Supply Air Total Cooling Energy",
+)
+HOURS = 8760
+
+_api = None
+_state = None
+
+
+def _ensure_api():
+    """
+    Load pyenergyplus once per worker process.
+    """
+    global _api, _state
+    if _api is None:
+        if str(eplus_dir) not in sys.path:
+            sys.path.insert(0, str(eplus_dir))
+        from pyenergyplus.api import EnergyPlusAPI
+        _api = EnergyPlusAPI()
+        _state = _api.state_manager.new_state()
+    return _api, _state
+
+
+def prepare_idf(idf_text: str) -> tuple:
+    """
+    Drop OUTPUT:VARIABLE / OUTPUT:METER objects and switch the ESO off.
+    Returns (idf text, ideal loads system name, needs ExpandObjects).
+    """
+    objects = []
+    system_name = None
+    needs_expand = False
+    for obj in parse_idf(idf_text):
+        cls = obj[0].upper()
+        if cls in ("OUTPUT:VARIABLE", "OUTPUT:METER", "OUTPUT:METER:METERFILEONLY"):
+            continue
+        if cls == "OUTPUTCONTROL:FILES" and len(obj) > 3:
+            obj = obj[:3] + ["No"] + obj[4:]        # Output ESO
+        elif cls == "ZONEHVAC:IDEALLOADSAIRSYSTEM":
+            system_name = obj[1]
+        elif cls == "HVACTEMPLATE:ZONE:IDEALLOADSAIRSYSTEM":
+            system_name = f"{obj[1]} Ideal Loads Air System"
+            needs_expand = True
+        objects.append(obj)
+    return format_idf(objects), system_name, needs_expand
+
+
+def run_in_process(idf_file: Path, weather: Path, pand_output: Path, timeout=None) -> str:
+    """
+    Simulate one IDF in this process. Returns "ok", "failed" or "timeout".
+    """
+    api, state = _ensure_api()
+    api.state_manager.reset_state(state)
+    api.runtime.set_console_output_status(state, False)
+
+    idf_str, system_name, needs_expand = prepare_idf(Path(idf_file).read_text(errors="replace"))
+    if system_name is None:
+        (pand_output / "python_subprocess.log").write_text("no ideal loads air system in IDF\n")
+        return "failed"
+    run_idf = pand_output / "in_api.idf"
+    run_idf.write_text(idf_str)
+
+    for var in VARIABLES:
+        api.exchange.request_variable(state, var, system_name)
+
+    data = np.zeros((HOURS, len(VARIABLES)))
+    handles = []
+    start = time.time()
+    timed_out = []
+
+    def collect(s):
+        if not handles:
+            if not api.exchange.api_data_fully_ready(s):
+                return
+            handles.extend(api.exchange.get_variable_handle(s, v, system_name) for v in VARIABLES)
+        if timeout and time.time() - start > timeout:
+            timed_out.append(True)
+            api.runtime.stop_simulation(s)
+            return
+        if api.exchange.warmup_flag(s) or min(handles) < 0:
+            return
+        hour = (api.exchange.day_of_year(s) - 1) * 24 + api.exchange.hour(s)
+        if hour < HOURS:                            # leap day weather files
+            for j, h in enumerate(handles):
+                data[hour, j] += api.exchange.get_variable_value(s, h)
+
+    # system timestep callback, ideal loads energy is reported per HVAC system timestep
+    api.runtime.callback_end_system_timestep_after_hvac_reporting(state, collect)
+
+    args = ["-w", str(weather), "-d", str(pand_output), "-a"]
+    if needs_expand:
+        args.append("-x")
+    exit_code = api.runtime.run_energyplus(state, args + [str(run_idf)])
+    run_idf.unlink(missing_ok=True)
+
+    if timed_out:
+        (pand_output / "python_subprocess.log").write_text(f"timeout after {timeout} s\n")
+        return "timeout"
+    if exit_code != 0 or not handles or min(handles) < 0:
+        (pand_output / "python_subprocess.log").write_text(
+            f"energyplus api exit code {exit_code}, variable handles {handles}\n")
+        return "failed"
+
+    np.savez(pand_output / RESULT_FILE, heating=data[:, 0], cooling=data[:, 1])
+    return "ok"
@@ -0,0 +1,149 @@
+"""
+fast reader for EnergyPlus eplusout.eso files
+the data dictionary is read once, then only the records of the requested
+variables are collected and converted to numpy arrays in one go.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+HEATING = "Zone Ideal Loads Supply Air Total Heating Energy"
+COOLING = "Zone Ideal Loads Supply Air Total Cooling Energy"
+
+# facility meters, equal to the variables above for one zone with ideal loads (see output_profiles.py)
+HEATING_METER = "DistrictHeatingWater:Facility"
+COOLING_METER = "DistrictCooling:Facility"
+
+J_PER_KWH = 3.6e6
+
+# records of a complete annual run period per reporting frequency (normal / leap year),
+# timestep series hold a whole number of records per hour
+YEAR_RECORDS = {"hourly": (8760, 8784), "daily": (365, 366), "monthly": (12,)}
+
+def read_dictionary(lines) -> dict:
+    """
+    Parse the data dictionary, returns {id: (key, name, unit, frequency)}.
+    Meters have no key, their name is returned as key "".
+    """
+    entries = {}
+    for line in lines:
+        if line.startswith("End of Data Dictionary"):
+            break
+        parts = line.rstrip("\n").split(",")
+        if len(parts) < 3 or not parts[0].isdigit() or parts[0] in ("1", "2", "3", "4", "5", "6"):
+            continue
+        if "[" in parts[2]:
+            key, label = "", parts[2]                   # meter: id,n,name [unit] !freq
+        else:
+            key, label = parts[2], ",".join(parts[3:])  # variable: id,n,key,name [unit] !freq
+        name_unit, _, freq = label.partition("!")
+        name, _, unit = name_unit.partition("[")
+        var_id = parts[0]
+        freq = freq.strip().split(" ")[0].lower()
+        unit = unit.split("]")[0]
+        entries[var_id] = (key.strip(), name.strip(), unit.strip(), freq)
+    return entries
+
+
+def read_eso(path, variables=(HEATING, COOLING)) -> dict:
+    """
+    Read the records of the given variables / meters from one ESO.
+    Returns {name: {"values": array, "month": array, "frequency": str, "unit": str}},
+    values of the same name with different keys (zones) are summed.
+    Only the last environment (the weather file run period) is kept.
+    Raises ValueError for an ESO without "End of Data" (killed / crashed run) or
+    with an incomplete run period.
+    """
+    wanted = {v.upper() for v in variables}
+    with open(path, "r", errors="replace") as f:
+        dictionary = read_dictionary(f)
+        ids = {i: e for i, e in dictionary.items() if e[1].upper() in wanted}
+        data_lines = f.read().splitlines()
+
+    values = {i: [] for i in ids}
+    months = {i: [] for i in ids}
+    month = 0
+    complete = False
+    for line in data_lines:
+        code, _, rest = line.partition(",")
+        if code in values:
+            values[code].append(rest.partition(",")[0])
+            months[code].append(month)
+        elif code == "1":
+            # new environment (design day / run period), drop what was collected before
+            for i in values:
+                values[i].clear()
+                months[i].clear()
+        elif code in ("2", "3", "4"):
+            month = int(rest.split(",")[1])
+        elif code == "End of Data":
+            complete = True
+            break
+    if not complete:
+        raise ValueError(f"{path}: no 'End of Data', the run did not finish")
+
+    out = {}
+    for i, (key, name, unit, freq) in ids.items():
+        arr = np.array(values[i], dtype=float)
+        if not full_year(len(arr), freq):
+            raise ValueError(f"{path}: {name} has {len(arr)} {freq} values, run period incomplete")
+        if name in out:
+            if len(out[name]["values"]) != len(arr):
+                raise ValueError(f"{path}: {name} has {len(out[name]['values'])} and {len(arr)} "
+                                 f"values for different keys, reporting frequencies differ")
+            out[name]["values"] = out[name]["values"] + arr
+            continue
+        out[name] = {"values": arr, "month": np.array(months[i], dtype=np.int8),
+                     "frequency": freq, "unit": unit}
+    return out
+
+
+def full_year(n: int, freq: str) -> bool:
+    """
+    True when n records of the frequency cover a whole year (other frequencies are not checked).
+    """
+    if freq == "timestep":
+        return any(n >= hours and n % hours == 0 for hours in YEAR_RECORDS["hourly"])
+    if freq in YEAR_RECORDS:
+        return n in YEAR_RECORDS[freq]
+    return True
+
+
+def summarise(series: dict) -> dict:
+    """
+    Annual total [kWh], monthly totals [kWh] and peak [W] of one series in J.
+    Monthly totals need monthly or finer reporting, the peak needs hourly (None otherwise).
+    """
+    values, month, freq = series["values"], series["month"], series["frequency"]
+    monthly = peak = None
+    if freq in ("hourly", "timestep", "daily", "monthly"):
+        monthly = np.bincount(month - 1, weights=values, minlength=12)[:12] / J_PER_KWH
+    if freq == "hourly":
+        peak = float(values.max() / 3600) if len(values) else 0.0
+    return {"annual": float(values.sum() / J_PER_KWH), "monthly": monthly, "peak": peak}
+
+
+def read_results(folder) -> dict:
+    """
+    Heating / cooling series of one simulation folder, from eplusout.eso
+    or from eplusout_hourly.npz (in-process backend).
+    Meter outputs (annual / monthly / daily profiles) are returned under HEATING / COOLING.
+    """
+    folder = Path(folder)
+    npz = folder / "eplusout_hourly.npz"
+    if npz.exists():
+        with np.load(npz) as d:
+            if len(d["heating"]) != YEAR_RECORDS["hourly"][0] or len(d["cooling"]) != YEAR_RECORDS["hourly"][0]:
+                raise ValueError(f"{npz}: not {YEAR_RECORDS['hourly'][0]} hourly values")
+            hours_per_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]) * 24
+            month = np.repeat(np.arange(1, 13, dtype=np.int8), hours_per_month)
+            return {
+                HEATING: {"values": d["heating"], "month": month, "frequency": "hourly", "unit": "J"},
+                COOLING: {"values": d["cooling"], "month": month, "frequency": "hourly", "unit": "J"},
+            }
+    series = read_eso(folder / "eplusout.eso", (HEATING, COOLING, HEATING_METER, COOLING_METER))
+    for meter, variable in ((HEATING_METER, HEATING), (COOLING_METER, COOLING)):
+        if meter in series and variable not in series:
+            series[variable] = series.pop(meter)
+    return series
@@ -0,0 +1,138 @@
+"""
+geometry simplification of the LoD 1.2 surfaces before IDF generation
+- collinear vertices are removed from every ring
+- adjacent coplanar walls (type F, rectangular and vertical) with the same boundary
+  condition and the same bottom / top height are merged into one wall
+fewer surfaces -> fewer shading / radiation exchange pairs in EnergyPlus
+coordinates in the units of the building JSONs (mm), tolerances in the same units
+"""
+
+import numpy as np
+
+
+def collapse_collinear(ring, tol):
+    """
+    Drop vertices that lie within tol of the line through their neighbours.
+    The ring is not closed (first vertex is not repeated), at least 3 vertices are kept.
+    """
+    pts = [list(p) for p in ring]
+    changed = True
+    while changed and len(pts) > 3:
+        changed = False
+        for i in range(len(pts)):
+            a, b, c = (np.asarray(pts[i - 1], dtype=float), np.asarray(pts[i], dtype=float),
+                       np.asarray(pts[(i + 1) % len(pts)], dtype=float))
+            ac = c - a
+            length = np.linalg.norm(ac)
+            if length == 0:
+                dist = np.linalg.norm(b - a)
+            else:
+                dist = np.linalg.norm(np.cross(b - a, ac)) / length
+            if dist <= tol:
+                del pts[i]
+                changed = True
+                break
+    return pts
+
+
+def _wall_frame(ring, tol):
+    """
+    (direction, normal, offset, t per vertex, z per vertex) of a vertical rectangular wall,
+    None for any other shape.
+    """
+    if len(ring) != 4:
+        return None
+    p = np.asarray(ring, dtype=float)
+    z = p[:, 2]
+    z_min, z_max = z.min(), z.max()
+    if z_max - z_min <= tol or not np.all((np.abs(z - z_min) <= tol) | (np.abs(z - z_max) <= tol)):
+        return None
+    xy = p[:, :2]
+    span = xy - xy[0]
+    k = int(np.argmax(np.linalg.norm(span, axis=1)))
+    if np.linalg.norm(span[k]) <= tol:
+        return None
+    direction = span[k] / np.linalg.norm(span[k])
+    normal = np.array([-direction[1], direction[0]])
+    if np.abs(span @ normal).max() > tol:
+        return None
+    # canonical direction so both walls of a pair use the same axis
+    if direction[0] < -1e-9 or (abs(direction[0]) <= 1e-9 and direction[1] < 0):
+        direction, normal = -direction, -normal
+    t = xy @ direction
+    t_min, t_max = t.min(), t.max()
+    if not np.all((np.abs(t - t_min) <= tol) | (np.abs(t - t_max) <= tol)):
+        return None
+    return {"direction": direction, "normal": normal, "offset": float(xy[0] @ normal),
+            "t": t, "z": z, "t_range": (t_min, t_max), "z_range": (z_min, z_max)}
+
+
+def _same_plane(fa, fb, tol):
+    return (abs(abs(fa["direction"] @ fb["direction"]) - 1) <= 1e-6
+            and abs(fa["offset"] - fb["offset"]) <= tol
+            and abs(fa["z_range"][0] - fb["z_range"][0]) <= tol
+            and abs(fa["z_range"][1] - fb["z_range"][1]) <= tol)
+
+
+def _merged_ring(ring, frame, t_range):
+    """
+    Stretch the first wall of a run to t_range, vertex order (and so the outward normal) is kept.
+    """
+    out = []
+    t0, t1 = frame["t_range"]
+    for (x, y, z), t in zip(ring, frame["t"]):
+        t_new = t_range[0] if abs(t - t0) <= abs(t - t1) else t_range[1]
+        xy = np.array([x, y], dtype=float) + (t_new - t) * frame["direction"]
+        out.append([float(xy[0]), float(xy[1]), z])
+    return out
+
+
+def merge_coplanar_walls(surfaces, tol):
+    """
+    Simplified copy of a building's surface list.
+    Returns (surfaces, number of walls merged away).
+    """
+    surfaces = [dict(s, Coordinates=[collapse_collinear(r, tol) for r in s["Coordinates"]])
+                for s in surfaces]
+
+    walls = []
+    for i, s in enumerate(surfaces):
+        if s.get("Type") != "F" or len(s["Coordinates"]) != 1:
+            continue
+        frame = _wall_frame(s["Coordinates"][0], tol)
+        if frame is not None:
+            walls.append((i, frame))
+
+    # runs of walls in one plane whose t ranges touch
+    removed = set()
+    replaced = {}
+    used = set()
+    for a, (i, fa) in enumerate(walls):
+        if i in used:
+            continue
+        bc = surfaces[i].get("BoundaryCondition", "EXPOSED").upper()
+        group = [(i, fa)] + [(j, fb) for j, fb in walls[a + 1:]
+                             if j not in used and _same_plane(fa, fb, tol)
+                             and surfaces[j].get("BoundaryCondition", "EXPOSED").upper() == bc]
+        group.sort(key=lambda w: w[1]["t_range"][0])
+        run = [group[0]]
+        for w in group[1:] + [None]:
+            if w is not None and abs(w[1]["t_range"][0] - run[-1][1]["t_range"][1]) <= tol:
+                run.append(w)
+                continue
+            if len(run) > 1:
+                first, frame = min(run, key=lambda r: r[0])      # keeps the lowest surface index
+                t_range = (run[0][1]["t_range"][0], run[-1][1]["t_range"][1])
+                replaced[first] = _merged_ring(surfaces[first]["Coordinates"][0], frame, t_range)
+                removed.update(r[0] for r in run if r[0] != first)
+            used.update(r[0] for r in run)
+            run = [w] if w is not None else []
+
+    out = []
+    for i, s in enumerate(surfaces):
+        if i in removed:
+            continue
+        if i in replaced:
+            s = dict(s, Coordinates=[replaced[i]])
+        out.append(s)
+    return out, len(removed)
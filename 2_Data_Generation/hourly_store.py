@@ -0,0 +1,82 @@
+"""
+columnar store for the hourly heating / cooling results of all buildings of one scenario
+one chunked, compressed zarr array (building x hour x variable, float32)
+plus the Pand ID index, so consumers read only the slices (buildings, months, hour ranges) they need
+"""
+
+from pathlib import Path
+
+import numpy as np
+import zarr
+
+from eso_reader import COOLING, HEATING
+
+HOURS = 8760
+VARIABLES = [HEATING, COOLING]
+CHUNKS = (64, 744, len(VARIABLES))   # 64 buildings x 31 days
+
+HOURS_PER_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]) * 24
+MONTH_START = np.concatenate([[0], np.cumsum(HOURS_PER_MONTH)])
+
+
+def create_store(path, pand_ids, variables=VARIABLES):
+    """
+    Create an empty store (NaN = not simulated / failed), returns the zarr array.
+    """
+    array = zarr.open_array(store=str(path), mode="w", shape=(len(pand_ids), HOURS, len(variables)),
+                            chunks=CHUNKS, dtype="float32", fill_value=np.nan)
+    array.attrs["pand_ids"] = [str(p) for p in pand_ids]
+    array.attrs["variables"] = list(variables)
+    array.attrs["unit"] = "J"
+    return array
+
+
+class HourlyStore:
+    """
+    Read access by Pand ID, month or hour range.
+    All selections return arrays of shape (buildings, hours, variables).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.array = zarr.open_array(store=str(path), mode="r")
+        self.pand_ids = list(self.array.attrs["pand_ids"])
+        self.variables = list(self.array.attrs["variables"])
+        self.index = {p: i for i, p in enumerate(self.pand_ids)}
+
+    def __len__(self):
+        return len(self.pand_ids)
+
+    def _rows(self, pand_ids):
+        if pand_ids is None:
+            return slice(None)
+        return np.array([self.index[str(p)] for p in pand_ids], dtype=np.int64)
+
+    def _select(self, pand_ids, hours: slice, variable=None) -> np.ndarray:
+        rows = self._rows(pand_ids)
+        var = slice(None) if variable is None else self.variables.index(variable)
+        if isinstance(rows, slice):
+            return self.array[rows, hours, var]
+        # read in sorted order (chunk friendly), return in the requested order
+        order = np.argsort(rows)
+        out = self.array.get_orthogonal_selection((rows[order], hours, var))
+        return out[np.argsort(order)]
+
+    def building(self, pand_id, variable=None) -> np.ndarray:
+        return self._select([pand_id], slice(None), variable)[0]
+
+    def hours(self, start: int, stop: int, pand_ids=None, variable=None) -> np.ndarray:
+        return self._select(pand_ids, slice(start, stop), variable)
+
+    def month(self, month: int, pand_ids=None, variable=None) -> np.ndarray:
+        """month 1-12"""
+        return self.hours(int(MONTH_START[month - 1]), int(MONTH_START[month]), pand_ids, variable)
+
+    def annual_totals(self, block: int = CHUNKS[0]) -> np.ndarray:
+        """
+        Annual sum per building and variable [J], streamed block by block.
+        """
+        out = np.empty((len(self), len(self.variables)))
+        for i in range(0, len(self), block):
+            out[i:i + block] = self.array[i:i + block].sum(axis=1)
+        return out
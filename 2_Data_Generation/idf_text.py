@@ -0,0 +1,71 @@
+"""
+light-weight text reader / writer for IDF files
+used where loading eppy + the IDD is too slow (hashing, patching, diffing thousands of IDFs)
+an object is a list of strings: [class name, field 1, field 2, ...]
+"""
+
+from pathlib import Path
+
+# vertex block position per geometry class (index of "Number of Vertices" in the object list)
+
+N_VERTICES_FIELD = {
+    "BUILDINGSURFACE:DETAILED": 11,
+    "FENESTRATIONSURFACE:DETAILED": 9,
+}
+
+
+def parse_idf(text: str) -> list:
+    """
+    Split IDF text into objects, comments ('!' to end of line) are dropped.
+    """
+    lines = [line.split("!", 1)[0] for line in text.splitlines()]
+    body = " ".join(lines)
+    objects = []
+    for chunk in body.split(";"):
+        fields = [f.strip() for f in chunk.split(",")]
+        if fields and fields[0]:
+            objects.append(fields)
+    return objects
+
+
+def read_idf(path) -> list:
+    return parse_idf(Path(path).read_text(encoding="utf-8", errors="replace"))
+
+
+def format_idf(objects) -> str:
+    """
+    Write objects back to IDF text (one field per line, no comments).
+    """
+    out = []
+    for obj in objects:
+        out.append(obj[0] + ",")
+        fields = obj[1:] or [""]
+        for i, f in enumerate(fields):
+            out.append(f"    {f}{';' if i == len(fields) - 1 else ','}")
+        out.append("")
+    return "\n".join(out)
+
+
+def objects_of(objects, class_name: str) -> list:
+    class_name = class_name.upper()
+    return [o for o in objects if o[0].upper() == class_name]
+
+
+def get_vertices(obj) -> list:
+    """
+    Return [(x, y, z), ...] of a BUILDINGSURFACE / FENESTRATIONSURFACE object.
+    """
+    pos = N_VERTICES_FIELD[obj[0].upper()]
+    n = int(float(obj[pos]))
+    vals = [float(v) for v in obj[pos + 1: pos + 1 + 3 * n]]
+    return [tuple(vals[i:i + 3]) for i in range(0, 3 * n, 3)]
+
+
+def set_vertices(obj, coords) -> list:
+    """
+    Return a copy of the object with the vertex block replaced.
+    """
+    pos = N_VERTICES_FIELD[obj[0].upper()]
+    head = obj[:pos]
+    flat = [f"{c:.6f}" for xyz in coords for c in xyz]
+    return head + [str(len(coords))] + flat
@@ -0,0 +1,32 @@
+"""
+output profiles: what each simulation reports, chosen at IDF generation time
+annual / monthly / daily use the facility meters, for one zone with an ideal loads
+system these equal the ideal loads supply air heating / cooling energy.
+hourly keeps the two OUTPUT:VARIABLE objects (needed for the hourly store / peaks).
+
+the ESO data dictionary records names and frequency, eso_reader maps both forms
+back to heating / cooling so the extractor handles every profile.
+"""
+
+from eso_reader import COOLING, COOLING_METER, HEATING, HEATING_METER
+
+PROFILES = {
+    "annual":  {"frequency": "Annual",  "meters": True},
+    "monthly": {"frequency": "Monthly", "meters": True},
+    "daily":   {"frequency": "Daily",   "meters": True},
+    "hourly":  {"frequency": "Hourly",  "meters": False},
+}
+
+
+def add_output_objects(idf, profile: str) -> None:
+    """
+    Add the output requests of one profile to an eppy IDF.
+    """
+    spec = PROFILES[profile]
+    if spec["meters"]:
+        for meter in (HEATING_METER, COOLING_METER):
+            idf.newidfobject("OUTPUT:METER", Key_Name=meter, Reporting_Frequency=spec["frequency"])
+    else:
+        for variable in (HEATING, COOLING):
+            idf.newidfobject("OUTPUT:VARIABLE", Key_Value="*", Variable_Name=variable,
+                             Reporting_Frequency=spec["frequency"])
@@ -0,0 +1,218 @@
+"""
+geometry-canonical simulation cache
+
+many terraced / gallery buildings share the same archetype and the same geometry
+up to a translation (and rotation). the IDF is reduced to a canonical form:
+- pand id removed from all object names
+- vertices translated to the origin (min x, y, z of the building)
+- rotation about z normalised ONLY for weather files listed in ORIENTATION_SAFE_WEATHER
+  (sun / wind direction make orientation matter for any real EPW)
+- surfaces sorted, vertex rings started at their smallest vertex
+the canonical model and the EPW content are hashed into one key.
+
+results are stored per key (eplusout.eso or eplusout_hourly.npz, eplusout.err) so a duplicate building
+reuses the annual and hourly results of the first simulated one.
+note the zone / surface names inside a reused ESO belong to the building that was simulated.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from idf_text import N_VERTICES_FIELD, get_vertices, read_idf
+
+CACHE_VERSION = 1    # bump when the canonical form changes
+ROUND = 3            # m, 1 mm
+
+# EPW file names for which a rotation of the building does not change the results
+# (e.g. synthetic test weather without radiation / wind). keep empty for real weather.
+ORIENTATION_SAFE_WEATHER = set()
+
+RESULT_FILES = ("eplusout.eso", "eplusout_hourly.npz", "eplusout.err")
+
+_weather_hashes = {}
+
+
+def weather_hash(epw_path) -> str:
+    epw_path = str(epw_path)
+    if epw_path not in _weather_hashes:
+        h = hashlib.sha256()
+        with open(epw_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _weather_hashes[epw_path] = h.hexdigest()
+    return _weather_hashes[epw_path]
+
+# canonical geometry
+
+def _pand_code(objects) -> str:
+    for obj in objects:
+        if obj[0].upper() == "BUILDING" and len(obj) > 1:
+            return obj[1].split(".")[-1]
+    return ""
+
+def _rotate(coords, angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return [(x * c - y * s, x * s + y * c, z) for x, y, z in coords]
+
+def _canonical_ring(coords):
+    """
+    Round and start the ring at its smallest vertex, vertex direction is kept.
+    """
+    ring = [tuple(round(v, ROUND) + 0.0 for v in xyz) for xyz in coords]
+    start = ring.index(min(ring))
+    return tuple(ring[start:] + ring[:start])
+
+def _principal_angle(surfaces):
+    """
+    Angle of the longest horizontal edge of all walls, used to align the building with x.
+    """
+    best, angle = -1.0, 0.0
+    for obj, coords in surfaces:
+        if obj[2].upper() != "WALL":
+            continue
+        for (x1, y1, z1), (x2, y2, z2) in zip(coords, coords[1:] + coords[:1]):
+            if abs(z1 - z2) > 1e-6:
+                continue
+            length = math.hypot(x2 - x1, y2 - y1)
+            if length > best:
+                best, angle = length, math.atan2(y2 - y1, x2 - x1)
+    return angle
+
+def _geometry_records(surfaces, windows, angle):
+    """
+    Surface records (without names) in a sorted, order-free form.
+    """
+    all_xyz = [xyz for _, coords in surfaces for xyz in _rotate(coords, angle)]
+    ox = min(x for x, _, _ in all_xyz)
+    oy = min(y for _, y, _ in all_xyz)
+    oz = min(z for _, _, z in all_xyz)
+
+    def place(coords):
+        return _canonical_ring([(x - ox, y - oy, z - oz) for x, y, z in _rotate(coords, angle)])
+
+    wins_by_host = {}
+    for obj, coords in windows:
+        # drop name (1) and host surface name (4)
+        attrs = tuple(obj[2:4] + obj[5:N_VERTICES_FIELD[obj[0].upper()]])
+        wins_by_host.setdefault(obj[4].upper(), []).append((attrs, place(coords)))
+
+    records = []
+    for obj, coords in surfaces:
+        # drop name (1), keep type, construction, zone, boundary condition, exposure ...
+        attrs = tuple(obj[2:N_VERTICES_FIELD[obj[0].upper()]])
+        wins = tuple(sorted(wins_by_host.get(obj[1].upper(), [])))
+        records.append((attrs, place(coords), wins))
+    return sorted(records)
+
+def canonical_model(objects, allow_rotation=False):
+    """
+    Return (non-geometry objects, geometry records) in canonical form.
+    """
+    code = _pand_code(objects)
+
+    def strip_code(fields):
+        return [f.replace(code, "{PAND}") if code else f for f in fields]
+
+    others, surfaces, windows = [], [], []
+    for obj in objects:
+        obj = strip_code(obj)
+        cls = obj[0].upper()
+        if cls == "BUILDINGSURFACE:DETAILED":
+            surfaces.append((obj, get_vertices(obj)))
+        elif cls == "FENESTRATIONSURFACE:DETAILED":
+            windows.append((obj, get_vertices(obj)))
+        else:
+            others.append([cls] + obj[1:])
+    others.sort()
+
+    if not surfaces:
+        return others, []
+    if not allow_rotation:
+        return others, _geometry_records(surfaces, windows, 0.0)
+
+    # align longest wall with x, resolve the 180 degree ambiguity by picking the smaller form
+    angle = -_principal_angle(surfaces)
+    return others, min(_geometry_records(surfaces, windows, angle),
+                       _geometry_records(surfaces, windows, angle + math.pi))
+
+def cache_key(idf_file, epw_path) -> str:
+    """
+    Hash of canonical geometry, boundary conditions, archetype (materials / constructions)
+    and weather of one simulation.
+    """
+    return cache_keys(idf_file, [epw_path])[0]
+
+def cache_keys(idf_file, epw_paths) -> list:
+    """
+    cache_key of one IDF for several weather files, the IDF is read once.
+    """
+    return model_keys(read_idf(idf_file), epw_paths)
+
+def model_keys(objects, epw_paths) -> list:
+    """
+    cache_keys of a model that is only held in memory (list of IDF objects).
+    """
+    models = {}
+    keys = []
+    for epw_path in epw_paths:
+        allow_rotation = Path(epw_path).name in ORIENTATION_SAFE_WEATHER
+        if allow_rotation not in models:
+            models[allow_rotation] = canonical_model(objects, allow_rotation)
+        others, geometry = models[allow_rotation]
+        payload = json.dumps([CACHE_VERSION, weather_hash(epw_path), others, geometry],
+                             separators=(",", ":"))
+        keys.append(hashlib.sha256(payload.encode("utf-8")).hexdigest())
+    return keys
+
+# persistent result store
+
+class ResultCache:
+    """
+    Results per key in <root>/<key[:2]>/<key>/, written atomically so parallel
+    runs (or a crash) never leave a half written entry.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def has(self, key: str) -> bool:
+        entry = self.entry(key)
+        return (entry / "eplusout.eso").exists() or (entry / "eplusout_hourly.npz").exists()
+
+    def put(self, key: str, result_folder: Path, source: str = "") -> None:
+        final = self.entry(key)
+        if self.has(key):
+            return
+        final.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=final.parent, prefix=".tmp_"))
+        try:
+            for name in RESULT_FILES:
+                if (Path(result_folder) / name).exists():
+                    shutil.copy2(Path(result_folder) / name, tmp / name)
+            (tmp / "entry.json").write_text(json.dumps(
+                {"key": key, "source": source, "created": time.strftime("%Y-%m-%d %H:%M:%S")}))
+            os.replace(tmp, final)
+        except OSError:
+            # another worker stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def restore(self, key: str, dest_folder: Path) -> bool:
+        if not self.has(key):
+            return False
+        dest_folder = Path(dest_folder)
+        dest_folder.mkdir(parents=True, exist_ok=True)
+        for name in RESULT_FILES:
+            src = self.entry(key) / name
+            if src.exists():
+                shutil.copy2(src, dest_folder / name)
+        return True
@@ -0,0 +1,150 @@
+"""
+simulation job queue in one SQLite file
+one job per (building, scenario) with a lease, heartbeat, retry count and result pointer.
+any number of worker processes (on any number of hosts sharing the file) claim jobs;
+when a worker dies its lease expires and the job goes back to pending.
+
+note SQLite needs working file locks: use a local disk for one host, for several hosts
+a shared filesystem with reliable locking (not every SMB / NFS mount qualifies).
+"""
+
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    scenario    TEXT NOT NULL,
+    building    TEXT NOT NULL,
+    idf_path    TEXT NOT NULL,
+    epw_path    TEXT NOT NULL,
+    output_dir  TEXT NOT NULL,
+    cost        INTEGER DEFAULT 0,
+    state       TEXT DEFAULT 'pending',      -- pending / running / done / failed
+    attempts    INTEGER DEFAULT 0,
+    worker      TEXT,
+    lease_until REAL,
+    result_path TEXT,
+    error       TEXT,
+    seconds     REAL,
+    updated     REAL,
+    UNIQUE (scenario, building)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, cost);
+"""
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+
+    def __init__(self, db_path, lease_seconds=600, max_attempts=3):
+        self.db_path = Path(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # autocommit, transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(self.db_path), timeout=120, isolation_level=None)
+        self.conn.execute("PRAGMA busy_timeout = 120000")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self, sql, params=()):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = self.conn.execute(sql, params)
+            self.conn.execute("COMMIT")
+            return cur.rowcount
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def submit(self, jobs) -> int:
+        """
+        jobs: iterable of dicts with scenario, building, idf_path, epw_path, output_dir, cost.
+        Existing (scenario, building) pairs are left as they are.
+        """
+        rows = [(j["scenario"], j["building"], str(j["idf_path"]), str(j["epw_path"]),
+                 str(j["output_dir"]), j.get("cost", 0), time.time()) for j in jobs]
+        self.conn.execute("BEGIN IMMEDIATE")
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (scenario, building, idf_path, epw_path, output_dir, cost, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        added = self.conn.total_changes - before
+        self.conn.execute("COMMIT")
+        return added
+
+    def claim(self, worker: str):
+        """
+        Lease the most expensive pending job, expired leases are re-queued first.
+        Returns the job as dict or None.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = 'lease expired (' || worker || ')', worker = NULL, updated = ? "
+                "WHERE state = 'running' AND lease_until < ?",
+                (self.max_attempts, now, now))
+            row = self.conn.execute(
+                "SELECT id, scenario, building, idf_path, epw_path, output_dir, attempts FROM jobs "
+                "WHERE state = 'pending' ORDER BY cost DESC, id LIMIT 1").fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET state = 'running', worker = ?, attempts = attempts + 1, "
+                    "lease_until = ?, updated = ? WHERE id = ?",
+                    (worker, now + self.lease_seconds, now, row[0]))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        keys = ("id", "scenario", "building", "idf_path", "epw_path", "output_dir", "attempts")
+        job = dict(zip(keys, row))
+        job["attempts"] += 1
+        return job
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """
+        Extend the lease, False when the lease was lost (expired and taken by another worker).
+        """
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND state = 'running'",
+            (now + self.lease_seconds, now, job_id, worker)) == 1
+
+    def complete(self, job_id: int, worker: str, result_path, seconds: float) -> None:
+        self._write(
+            "UPDATE jobs SET state = 'done', result_path = ?, seconds = ?, error = NULL, "
+            "lease_until = NULL, updated = ? WHERE id = ? AND worker = ?",
+            (str(result_path), seconds, time.time(), job_id, worker))
+
+    def fail(self, job_id: int, worker: str, error: str, retry: bool) -> None:
+        self._write(
+            "UPDATE jobs SET state = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'failed' END, "
+            "error = ?, worker = NULL, lease_until = NULL, updated = ? WHERE id = ? AND worker = ?",
+            (int(retry), self.max_attempts, error, time.time(), job_id, worker))
+
+    def reset_failed(self) -> int:
+        return self._write("UPDATE jobs SET state = 'pending', attempts = 0, error = NULL WHERE state = 'failed'")
+
+    def counts(self) -> dict:
+        rows = self.conn.execute("SELECT scenario, state, COUNT(*) FROM jobs GROUP BY scenario, state")
+        out = {}
+        for scenario, state, n in rows:
+            out.setdefault(scenario, {})[state] = n
+        return out
+
+    def active(self) -> int:
+        """pending + running jobs"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state IN ('pending', 'running')").fetchone()[0]
@@ -1,16 +1,21 @@
 # flatten vertex data
 
-import os, json, csv, itertools
-from collections import OrderedDict
+import json
 from pathlib import Path
 from tqdm import tqdm
 import concurrent.futures
 
+from vertex_ragged import RaggedVertices
+
 # vertex data written once. # checked outliers same for all scenarios. 
 
 PAD_VALUE  = -1  # value when vertex/unit‑pair slot does not exist
 INDEXES = [6, 7, 8, 21]
 
+# ragged output flat_vertex_{idx}.npz (vertex_ragged.py), read by 4C / 5B / 6B
+# the padded csv is opt-in, only for FORMAT = "csv" in 4C_merge_vertices.py or older readers
+WRITE_DENSE_CSV = False
+
 # paths
 ROOT_INPUT = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\1_enrich_jsons\A1_base_2020")
 ROOT_OUTPUT = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\3_flatten_feat")
@@ -30,45 +35,26 @@ def explode_surfaces(surface: dict):
             "Angles" : units[2 * i : 2 * i + 2],
         }
 
-def scan_max_lengths(files):
-    max_dists = max_units = 0
-    for fn in files:
-        with fn.open(encoding="utf-8") as f:
-            b = json.load(f)
-        for s in b.get("Surfaces", []):
-            for face in explode_surfaces(s):
-                max_dists = max(max_dists, len(face.get("Distances", [])))
-                max_units = max(max_units, len(face.get("Angles", [])))
-    return max_dists, max_units
-
-def flatten_json(fn, max_dists, max_units):
+def flatten_json(fn):
+    """
+    One building as (pand id, surface types, distances per surface, angle pairs per surface).
+    """
     with fn.open(encoding="utf-8") as f:
         b = json.load(f)
-    meta = [b.get("Pand ID")]
-    rows = []
-    surf_idx = 0
+    types, dists, angles = [], [], []
     for s in b.get("Surfaces", []):
         for face in explode_surfaces(s):
-            dists   = face.get("Distances", [])
-            units2d = list(itertools.chain.from_iterable(face.get("Angles", [])))
-
-            dists = [round(d, 4) if d != PAD_VALUE else PAD_VALUE for d in dists]
-            units2d = [round(u, 4) if u != PAD_VALUE else PAD_VALUE for u in units2d]
-
-            row = (
-                meta +
-                [surf_idx, face.get("Type")] +
-                dists + [PAD_VALUE] * (max_dists - len(dists)) +
-                units2d + [PAD_VALUE] * (max_units * 2 - len(units2d))
-            )
-            rows.append(row)
-            surf_idx += 1
-    return rows
+            types.append(face.get("Type"))
+            dists.append([round(d, 4) if d != PAD_VALUE else PAD_VALUE for d in face.get("Distances", [])])
+            angles.append([[round(u, 4) if u != PAD_VALUE else PAD_VALUE for u in pair]
+                           for pair in face.get("Angles", [])])
+    return b.get("Pand ID"), types, dists, angles
 
 def process_subfolder(idx):
     input_dir = ROOT_INPUT / f"enrich_{idx}"
     output_dir = ROOT_OUTPUT / f"flat_vertex_{idx}"
     output_dir.mkdir(parents=True, exist_ok=True)
+    ragged_path = output_dir / f"flat_vertex_{idx}.npz"
     csv_path = output_dir / f"flat_vertex_{idx}.csv"
 
     files = list(input_dir.glob("*.json"))
@@ -76,36 +62,22 @@ def process_subfolder(idx):
         print(f"No files in {input_dir}")
         return
 
-    # determine max dists/units for columns
-    max_dists, max_units = scan_max_lengths(files)
-
-    base_cols = [
-        "Pand ID",
-        "Surface Index", "Surface Type"
-    ]
-    dist_cols = [f"d{i+1}" for i in range(max_dists)]
-    unit_cols = list(itertools.chain.from_iterable(
-        (f"ux{i+1}", f"uy{i+1}") for i in range(max_units)))
-    header = base_cols + dist_cols + unit_cols
-
-    # flatten in parallel, then concatenate all rows
-    rows = []
+    # single pass, each json is read once, no padding
     with concurrent.futures.ProcessPoolExecutor() as executor:
-        for chunk in tqdm(executor.map(flatten_json, files, [max_dists]*len(files), [max_units]*len(files)),
-                          total=len(files), desc=f"enrich_{idx} -> flat_vertex_{idx}"):
-            rows.extend(chunk)
+        buildings = list(tqdm(executor.map(flatten_json, files, chunksize=50),
+                              total=len(files), desc=f"enrich_{idx} -> flat_vertex_{idx}"))
 
-    # write CSV
-    with open(csv_path, "w", newline="", encoding="utf-8") as f_csv:
-        writer = csv.writer(f_csv)
-        writer.writerow(header)
-        writer.writerows(rows)
+    ragged = RaggedVertices.from_buildings(buildings)
+    ragged.save(ragged_path)
+    print(f"Written: {ragged_path} ({ragged.n_buildings} buildings, {ragged.n_surfaces} surfaces)")
 
-    print(f"Written: {csv_path}")
+    # legacy padded csv, padding is applied here from the ragged arrays
+    if WRITE_DENSE_CSV:
+        ragged.to_dense(pad=PAD_VALUE).to_csv(csv_path, index=False)
+        print(f"Written: {csv_path}")
 
 if __name__ == "__main__":
     for idx in INDEXES:
         print(f"Processing enrich_{idx} ...")
         process_subfolder(idx)
     print("All done.")
-
@@ -0,0 +1,234 @@
+import json
+from collections import OrderedDict
+from pathlib import Path
+import concurrent.futures
+import pandas as pd
+from tqdm import tqdm
+
+""""
+A1_base_2020
+A2_base_2050
+A3_base_2080
+B1_retro_2020
+B2_retro_2050
+B3_retro_2080
+"""
+# one pass per building: validate + join energy labels (1_enrich_json_labels.py),
+# derive volume / total floor area / compactness (2_add_features.py) and flatten to the
+# geometry csv columns (3A_flatten_geo_all.py). each vertex json is read once, the
+# enriched jsons are only written when KEEP_JSON is set (debugging)
+
+# paths
+INDEXES = [6, 7, 8, 21]
+ROOT_VERTEX = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\0_vertex_jsons")
+ROOT_DEMAND = Path(r"C:\thesis\CLEAN_WORKFLOW\3_demand_out\B3_retro_2080")
+ROOT_OUTPUT = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\3_flatten_feat\B3_retro_2080")
+ROOT_JSON   = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\2_add_features\B3_retro_2080")
+ROOT_OUTPUT.mkdir(parents=True, exist_ok=True)
+
+combined_csv = ROOT_OUTPUT / "flattened_geometry_all.csv"
+
+KEEP_JSON = False   # also write add_feat_{idx}/<pand>.json as 2_add_features.py did
+
+required_fields = [
+    "Archetype ID",
+    "Construction Year",
+    "Number of Floors",
+    "Wall Area",
+    "Roof Area (Flat)",
+    "Roof Area (Sloped)",
+    "Floor Area",
+    "Shared Wall Area",
+    "Absolute Height (70%)",
+]
+numeric_fields = {
+    "Wall Area",
+    "Roof Area (Flat)",
+    "Roof Area (Sloped)",
+    "Floor Area",
+    "Shared Wall Area",
+    "Absolute Height (70%)",
+}
+
+FEATURES = [
+    "Pand ID", "Archetype ID", "Construction Year", "Number of Floors",
+    "Wall Area", "Roof Area (Flat)", "Roof Area (Sloped)", "Floor Area",
+    "Shared Wall Area", "Building Height (70%)", "Building Volume",
+    "Total Floor Area", "Compactness Ratio",
+    "Annual Heating", "Annual Cooling"
+]
+
+# energy lookup, loaded once per worker process
+
+energy_lookup = {}
+
+def load_energy_lookup(demands_path):
+    with open(demands_path, "r", encoding="utf-8") as f:
+        energy_data = json.load(f)["buildings"]
+    return {
+        str(b["Pand ID"]): {
+            "Annual Heating": b.get("Annual Heating", None),
+            "Annual Cooling": b.get("Annual Cooling", None),
+            "Total Demand": b.get("Total Demand", None),
+            "Energy Label": b.get("Energy Label", None),
+            "Archetype ID": b.get("Archetype ID", None)
+        }
+        for b in energy_data
+    }
+
+def init_worker(demands_path):
+    global energy_lookup
+    energy_lookup = load_energy_lookup(demands_path)
+
+# steps
+
+def enrich(building_data):
+    """
+    Validate the vertex json and join the energy labels, returns (data, None) or (None, issue).
+    """
+    missing = []
+    for field in required_fields:
+        val = building_data.get(field, None)
+        if val is None or (field in numeric_fields and not isinstance(val, (int, float, str))):
+            missing.append(field)
+            continue
+        if field in numeric_fields:
+            try:
+                float(val)
+            except (TypeError, ValueError):
+                missing.append(field)
+    if missing:
+        return None, f"{building_data.get('Pand ID', 'UNKNOWN')}: missing: {', '.join(missing)}"
+
+    pand_id = str(building_data.get("Pand ID", "UNKNOWN"))
+    pand_id_short = pand_id.split('.')[-1]
+
+    # handles short and full pand if name
+    energy = energy_lookup.get(pand_id_short) or energy_lookup.get(pand_id)
+    if not energy:
+        return None, f"{pand_id_short}: No energy data"
+
+    enriched = building_data.copy()
+    enriched["Pand ID"] = pand_id_short
+    enriched.update(energy)
+    return enriched, None
+
+def add_features(data):
+    """
+    Building Volume, Total Floor Area, Compactness Ratio after "Absolute Height (70%)".
+    """
+    floor_area = float(data["Floor Area"])
+    height70   = float(data["Absolute Height (70%)"])
+    n_floors   = float(data["Number of Floors"])
+    wall_area  = float(data["Wall Area"])
+
+    building_volume   = floor_area * height70
+    total_floor_area  = floor_area * n_floors
+    compactness_ratio = wall_area / building_volume if building_volume else None
+
+    ordered = OrderedDict()
+    for k, v in data.items():
+        ordered[k] = v
+        if k == "Absolute Height (70%)":
+            ordered["Building Volume"]   = round(building_volume, 4)
+            ordered["Total Floor Area"]  = round(total_floor_area, 4)
+            ordered["Compactness Ratio"] = round(compactness_ratio, 4) if compactness_ratio is not None else None
+    return ordered
+
+def flatten(jd):
+    return {
+        "Pand ID": jd.get("Pand ID", ""),
+        "Archetype ID": jd.get("Archetype ID", ""),
+        "Construction Year": jd.get("Construction Year", None),
+        "Number of Floors": jd.get("Number of Floors", None),
+        "Wall Area": round(jd.get("Wall Area", 0), 4),
+        "Roof Area (Flat)": round(jd.get("Roof Area (Flat)", 0), 4),
+        "Roof Area (Sloped)": round(jd.get("Roof Area (Sloped)", 0), 4),
+        "Floor Area": round(jd.get("Floor Area", 0), 4),
+        "Shared Wall Area": round(jd.get("Shared Wall Area", 0), 4),
+        "Building Height (70%)": round(jd.get("Absolute Height (70%)", 0), 4),
+        "Building Volume": round(jd.get("Building Volume", 0), 4),
+        "Total Floor Area": round(jd.get("Total Floor Area", 0), 4),
+        "Compactness Ratio": round(jd.get("Compactness Ratio", 0), 4),
+        "Annual Heating": round(jd.get("Annual Heating", 0), 4),
+        "Annual Cooling": round(jd.get("Annual Cooling", 0), 4)
+    }
+
+def process_file(args):
+    """
+    Returns (row, issue), one of both is None.
+    """
+    json_path, json_dir = args
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            building_data = json.load(f)
+    except Exception as e:
+        return None, f"{json_path.name}: error: {e}"
+
+    data, issue = enrich(building_data)
+    if issue:
+        return None, issue
+    if any(data.get(k) in [None, ""] for k in ("Floor Area", "Absolute Height (70%)", "Number of Floors", "Wall Area")):
+        return None, f"{data['Pand ID']}: missing feature fields"
+    try:
+        data = add_features(data)
+    except Exception as e:
+        return None, f"{data['Pand ID']}: value conversion error: {e}"
+
+    if json_dir is not None:
+        with open(json_dir / f"{data['Pand ID']}.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+
+    try:
+        return flatten(data), None
+    except Exception as e:
+        return None, f"{data['Pand ID']}: flatten error: {e}"
+
+def process_index(idx):
+    input_dir = ROOT_VERTEX / f"vertex_{idx}"
+    output_dir = ROOT_OUTPUT / f"flatten_geo_{idx}"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    csv_path = output_dir / f"flattened_geometry_{idx}.csv"
+    demands_path = ROOT_DEMAND / f"clean_labels_{idx}.json"
+
+    json_dir = None
+    if KEEP_JSON:
+        json_dir = ROOT_JSON / f"add_feat_{idx}"
+        json_dir.mkdir(parents=True, exist_ok=True)
+
+    files = list(input_dir.glob("*.json"))
+    rows, log = [], []
+    with concurrent.futures.ProcessPoolExecutor(initializer=init_worker, initargs=(demands_path,)) as executor, \
+            tqdm(total=len(files), desc=f"vertex_{idx} -> flatten_geo_{idx}") as pbar:
+        for row, issue in executor.map(process_file, ((f, json_dir) for f in files), chunksize=50):
+            if row:
+                rows.append(row)
+            else:
+                log.append(issue)
+            pbar.update(1)
+
+    df = pd.DataFrame(rows, columns=FEATURES)
+    df.to_csv(csv_path, index=False)
+    print(f"Flattened data saved to: {csv_path}")
+
+    if log:
+        log_path = output_dir / "validation_log.txt"
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log) + "\n")
+        print(f"{len(log)} issues logged to {log_path}")
+    return csv_path
+
+if __name__ == "__main__":
+    all_csvs = []
+    for idx in INDEXES:
+        print(f"Processing vertex_{idx} ...")
+        all_csvs.append(process_index(idx))
+    print("All per-folder CSVs written.")
+
+    # Merge all per-folder CSVs into one big CSV
+    print(f"Combining all subfolder CSVs into: {combined_csv}")
+
+    dfs = [pd.read_csv(csv_path, dtype={"Pand ID": str}) for csv_path in all_csvs]
+    merged = pd.concat(dfs, ignore_index=True)
+    merged.to_csv(combined_csv, index=False)
+    print("All done.")
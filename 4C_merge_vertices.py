@@ -1,9 +1,14 @@
 # COMBINE FLATTENED DATA FROM 4 ARCHETYPES. 
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 from tqdm import tqdm
 
+from vertex_ragged import RaggedVertices
+
 # configure 
 INPUT_FILES = [
     r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\3_flatten_feat\flat_vertex_6\flat_vertex_6.csv",
@@ -13,60 +18,112 @@ INPUT_FILES = [
 ]
 OUTPUT_CSV = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\4_merge_vertex\flat_vertex_ALL.csv")
 
+# "ragged": concat the flat_vertex_{idx}.npz files of 3D_flatten_vertex.py (vertex_ragged.py), no padding
+# "parquet": padded csv files streamed chunk by chunk into one parquet file
+# "csv":     same, written as csv
+FORMAT = "ragged"
+OUTPUT_RAGGED  = OUTPUT_CSV.with_suffix(".npz")
+OUTPUT_PARQUET = OUTPUT_CSV.with_suffix(".parquet")
+
+CHUNK = 100_000   # rows per chunk when streaming the padded csv files
+
 PAD = -1          # value for missing d / ux / uy slots
 DEC = 4           # decimal places to keep on real numbers
 
-#  check files to find max column counts 
-max_d = max_ux = max_uy = 0
-for fp in INPUT_FILES:
-    cols = pd.read_csv(fp, nrows=0).columns
-    max_d  = max(max_d , sum(c.startswith("d" ) for c in cols))
-    max_ux = max(max_ux, sum(c.startswith("ux") for c in cols))
-    max_uy = max(max_uy, sum(c.startswith("uy") for c in cols))
-
-# desired full column list in correct order
-def make_cols(n, prefix):
-    return [f"{prefix}{i+1}" for i in range(n)]
-
-DIST_COLS = make_cols(max_d , "d")
-UX_COLS   = make_cols(max_ux, "ux")
-UY_COLS   = make_cols(max_uy, "uy")
-
-# read, pad, and store dfs
-dfs = []
-for fp in tqdm(INPUT_FILES, desc="Padding files", unit="file"):
-    df = pd.read_csv(fp, dtype={"Pand ID": "string"})  # Ensures leading zeros are preserved
-
-    # add any missing d / ux / uy cols with PAD value
-    for c in DIST_COLS:
-        if c not in df.columns:
-            df[c] = PAD
-    for c in UX_COLS:
-        if c not in df.columns:
-            df[c] = PAD
-    for c in UY_COLS:
-        if c not in df.columns:
-            df[c] = PAD
-
-    # round numeric d / ux / uy vals (except PAD) to DEC decimals
-    for c in DIST_COLS + UX_COLS + UY_COLS:
-        df[c] = df[c].apply(lambda v: round(v, DEC) if v != PAD else PAD)
-
-    # uniform column order
-    meta_cols = [c for c in df.columns if not (c.startswith("d") or c.startswith("ux") or c.startswith("uy"))]
-    df = df[meta_cols + DIST_COLS + UX_COLS + UY_COLS]
-    dfs.append(df)
-
-# concat all padded frames row-wise
-combined = pd.concat(dfs, ignore_index=True)
-
-# ensure "Pand ID" is still a string before writing
-if "Pand ID" in combined.columns:
-    combined["Pand ID"] = combined["Pand ID"].astype(str)
-
-# write out with progress bar
-with tqdm(total=len(combined), desc="Writing rows", unit="row") as bar:
-    combined.to_csv(OUTPUT_CSV, index=False)
-    bar.update(len(combined))
-
-print("\nCombined file saved to:", OUTPUT_CSV)
+def merge_ragged():
+    parts = [RaggedVertices.load(Path(fp).with_suffix(".npz"))
+             for fp in tqdm(INPUT_FILES, desc="Reading files", unit="file")]
+    combined = RaggedVertices.concat(parts)
+
+    # round real values (except PAD) to DEC decimals, the arrays hold no padding
+    for values in (combined.dist_values, combined.angle_values):
+        mask = values != PAD
+        values[mask] = np.round(values[mask], DEC)
+
+    OUTPUT_RAGGED.parent.mkdir(parents=True, exist_ok=True)
+    combined.save(OUTPUT_RAGGED)
+    print(f"\nCombined file saved to: {OUTPUT_RAGGED} "
+          f"({combined.n_buildings} buildings, {combined.n_surfaces} surfaces)")
+
+def unified_columns():
+    """
+    Output columns from the csv headers only: meta columns, d1..dN, ux1..uxM, uy1..uyM.
+    """
+    meta, max_d, max_ux, max_uy = [], 0, 0, 0
+    for fp in INPUT_FILES:
+        cols = pd.read_csv(fp, nrows=0).columns
+        meta += [c for c in cols if not c.startswith(("d", "ux", "uy")) and c not in meta]
+        max_d  = max(max_d , sum(c.startswith("d" ) for c in cols))
+        max_ux = max(max_ux, sum(c.startswith("ux") for c in cols))
+        max_uy = max(max_uy, sum(c.startswith("uy") for c in cols))
+
+    # desired full column list in correct order
+    def make_cols(n, prefix):
+        return [f"{prefix}{i+1}" for i in range(n)]
+
+    return meta, make_cols(max_d, "d") + make_cols(max_ux, "ux") + make_cols(max_uy, "uy")
+
+def column_kinds(meta_cols, value_cols) -> dict:
+    """
+    dtype kind ("i" int, "f" float, "O" other) every column has in the merged table, as the
+    in-memory concat of whole files would infer it. A column that is integer in every file
+    (e.g. all PAD) is written as -1, not -1.0. Needs one read of the data, not only the header.
+    """
+    kinds = {}
+    for fp in tqdm(INPUT_FILES, desc="Scanning dtypes", unit="file"):
+        file_kinds = {}
+        for chunk in pd.read_csv(fp, dtype={"Pand ID": "string"}, chunksize=CHUNK):
+            for c in chunk.columns:
+                k = chunk[c].dtype.kind if chunk[c].dtype.kind in "if" else "O"
+                file_kinds[c] = max(file_kinds.get(c, "i"), k, key="ifO".index)
+        for c in meta_cols + value_cols:
+            # missing value slots become PAD (int), missing meta columns NaN (float)
+            k = file_kinds.get(c, "i" if c in value_cols else "f")
+            kinds[c] = max(kinds.get(c, "i"), k, key="ifO".index)
+    return kinds
+
+def padded_chunks(meta_cols, value_cols, kinds):
+    """
+    Chunks of all input files in the output column order, missing slots PAD,
+    real values (except PAD) rounded to DEC decimals.
+    """
+    int_cols = [c for c in meta_cols + value_cols if kinds[c] == "i"]
+    float_cols = [c for c in meta_cols + value_cols if kinds[c] == "f"]
+    for fp in INPUT_FILES:
+        # Pand ID as string, ensures leading zeros are preserved
+        for chunk in pd.read_csv(fp, dtype={"Pand ID": "string"}, chunksize=CHUNK):
+            values = chunk.reindex(columns=value_cols, fill_value=PAD).to_numpy(dtype=np.float64)
+            values = np.where(values == PAD, PAD, np.round(values, DEC))
+            out = chunk.reindex(columns=meta_cols).reset_index(drop=True)
+            out = pd.concat([out, pd.DataFrame(values, columns=value_cols)], axis=1)
+            yield out.astype({**{c: np.int64 for c in int_cols}, **{c: np.float64 for c in float_cols}})
+
+def merge_csv():
+    meta_cols, value_cols = unified_columns()
+    kinds = column_kinds(meta_cols, value_cols)
+    total = 0
+    writer = None
+    try:
+        with tqdm(desc="Merging rows", unit="row") as bar:
+            for chunk in padded_chunks(meta_cols, value_cols, kinds):
+                if FORMAT == "parquet":
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        OUTPUT_PARQUET.parent.mkdir(parents=True, exist_ok=True)
+                        writer = pq.ParquetWriter(OUTPUT_PARQUET, table.schema)
+                    writer.write_table(table.cast(writer.schema))
+                else:
+                    OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
+                    chunk.to_csv(OUTPUT_CSV, mode="w" if total == 0 else "a", header=total == 0, index=False)
+                total += len(chunk)
+                bar.update(len(chunk))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print("\nCombined file saved to:", OUTPUT_PARQUET if FORMAT == "parquet" else OUTPUT_CSV, f"({total:,} rows)")
+
+if FORMAT == "ragged":
+    merge_ragged()
+else:
+    merge_csv()
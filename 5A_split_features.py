@@ -1,13 +1,22 @@
-import dask.dataframe as dd
-from sklearn.model_selection import train_test_split
+import json
+import numpy as np
+import pandas as pd
 from pathlib import Path
+from tqdm import tqdm
 
 """
 Split a single merged-building CSV into 70 / 10 / 20 train / val / test sets.
-One row per Pand ID in the source file (already 1 row / Pand).  
-Stratify both splits on *Archetype ID* so each archetypes proportion is
+One row per Pand ID in the source file (already 1 row / Pand).
+Stratified on *Archetype ID* so each archetypes proportion is
 preserved in train, val, and test.
 
+every Pand ID gets a seeded 64 bit hash, inside an archetype the buildings with the
+lowest hashes go to test, the next ones to validate, the rest to train (per-stratum quotas)
+- pass 1 only keeps the hashes per archetype to fix the quota boundaries (split_manifest.json)
+- pass 2 streams the csv once and writes train / validate / test + split_manifest.csv
+the same Pand ID always gets the same hash, REUSE_MANIFEST applies the boundaries of
+another year / scenario so the splits are identical without pass 1
+
 2020
 2050
 2080
@@ -21,53 +30,116 @@ OUTPUT_DIR = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\5_split\2080")
 OUTPUT_TRAIN      = OUTPUT_DIR / "train.csv"
 OUTPUT_VALIDATION = OUTPUT_DIR / "validate.csv"
 OUTPUT_TEST       = OUTPUT_DIR / "test.csv"
+MANIFEST_JSON     = OUTPUT_DIR / "split_manifest.json"
+MANIFEST_CSV      = OUTPUT_DIR / "split_manifest.csv"
+
+# split_manifest.json of an earlier run (e.g. 5_split\2020), None to compute the boundaries
+REUSE_MANIFEST = None
+
+SEED = 42
+TEST_SIZE = 0.20
+VAL_SIZE  = 0.10
+CHUNK = 200_000   # rows per chunk when streaming the merged csv
+
+SPLITS = ["test", "validate", "train"]   # order of the hash ranges
+OUTPUTS = {"train": OUTPUT_TRAIN, "validate": OUTPUT_VALIDATION, "test": OUTPUT_TEST}
 
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-# load dask
-df = dd.read_csv(INPUT_CSV, assume_missing=True, dtype={"Pand ID": "object"})
-
-# building level table for stratified split 
-buildings = (
-    df[["Pand ID", "Archetype ID"]]
-    .drop_duplicates()
-    .compute()
-)
-
-# split to 20% test
-train_val_bld, test_bld = train_test_split(
-    buildings,
-    test_size=0.20,  # 20% test
-    shuffle=True,
-    stratify=buildings["Archetype ID"],
-    random_state=42
-)
-
-# split remaining 80% into 70/10 train/val
-# 10% of *original* is 12.5% of the 80% leftover
-train_bld, val_bld = train_test_split(
-    train_val_bld,
-    test_size=0.125,  # 0.125 * 0.80 = 0.10 of original
-    shuffle=True,
-    stratify=train_val_bld["Archetype ID"],
-    random_state=42
-)
-
-train_ids = train_bld["Pand ID"]
-val_ids   = val_bld  ["Pand ID"]
-test_ids  = test_bld ["Pand ID"]
-
-# filter original rows into train / val / test dask frames ─
-train_ddf = df[df["Pand ID"].isin(train_ids)]
-val_ddf   = df[df["Pand ID"].isin(val_ids)]
-test_ddf  = df[df["Pand ID"].isin(test_ids)]
-
-# write CSVs (single file each)
-train_ddf.to_csv(OUTPUT_TRAIN,      single_file=True, index=False)
-val_ddf  .to_csv(OUTPUT_VALIDATION, single_file=True, index=False)
-test_ddf .to_csv(OUTPUT_TEST,       single_file=True, index=False)
+def read_chunks(usecols=None):
+    return pd.read_csv(INPUT_CSV, usecols=usecols, dtype={"Pand ID": "string", "Archetype ID": "string"},
+                       chunksize=CHUNK)
+
+def pand_hash(pand_ids: pd.Series) -> np.ndarray:
+    """
+    Seeded 64 bit hash per Pand ID, same value in every run / file.
+    """
+    return pd.util.hash_pandas_object(pand_ids.astype(str), index=False,
+                                      hash_key=f"{SEED:016d}"[-16:]).to_numpy(dtype=np.uint64)
+
+def quota_boundaries() -> dict:
+    """
+    Pass 1: {archetype: {"n", "test_end", "validate_end"}}, a building is test when its hash is
+    below test_end, validate below validate_end, train otherwise.
+    """
+    hashes = {}
+    for chunk in tqdm(read_chunks(["Pand ID", "Archetype ID"]), desc="Hashing buildings", unit="chunk"):
+        h = pand_hash(chunk["Pand ID"])
+        arch = chunk["Archetype ID"].fillna("").to_numpy(dtype=str)
+        for a in np.unique(arch):
+            hashes.setdefault(a, []).append(h[arch == a])
+
+    strata = {}
+    for a, parts in sorted(hashes.items()):
+        h = np.unique(np.concatenate(parts))    # sorted, duplicate rows of a Pand counted once
+        n = len(h)
+        n_test = int(round(n * TEST_SIZE))
+        n_val  = int(round(n * VAL_SIZE))
+        bound = lambda k: int(h[k]) if k < n else 2**64 - 1
+        strata[a] = {"n": n, "n_test": n_test, "n_validate": n_val, "n_train": n - n_test - n_val,
+                     "test_end": bound(n_test), "validate_end": bound(n_test + n_val)}
+    return strata
+
+def default_boundaries() -> dict:
+    """
+    Boundaries for archetypes missing from a reused manifest: plain hash fractions.
+    """
+    return {"test_end": int(TEST_SIZE * 2**64), "validate_end": int((TEST_SIZE + VAL_SIZE) * 2**64)}
+
+def assign(chunk: pd.DataFrame, strata: dict) -> np.ndarray:
+    """
+    Split name per row.
+    """
+    h = pand_hash(chunk["Pand ID"])
+    bounds = list(strata.values()) + [default_boundaries()]    # position -1: unknown archetype
+    pos = pd.Index(list(strata)).get_indexer(chunk["Archetype ID"].fillna("").astype(str))
+    test_end = np.array([b["test_end"] for b in bounds], dtype=np.uint64)[pos]
+    val_end  = np.array([b["validate_end"] for b in bounds], dtype=np.uint64)[pos]
+    return np.where(h < test_end, "test", np.where(h < val_end, "validate", "train"))
+
+
+if REUSE_MANIFEST is not None:
+    with open(REUSE_MANIFEST, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest["seed"] != SEED:
+        raise ValueError(f"{REUSE_MANIFEST} was made with seed {manifest['seed']}, not {SEED}")
+    strata = manifest["strata"]
+    print("Reusing split boundaries of", REUSE_MANIFEST)
+else:
+    strata = quota_boundaries()
+
+with open(MANIFEST_JSON, "w", encoding="utf-8") as f:
+    json.dump({"seed": SEED, "test_size": TEST_SIZE, "val_size": VAL_SIZE,
+               "source": str(INPUT_CSV), "strata": strata}, f, indent=2)
+
+# pass 2: route every row to its split, one read of the csv
+first_write = {split: True for split in SPLITS + ["manifest"]}
+counts = {split: 0 for split in SPLITS}
+manifest_ids = set()    # Pand IDs already in split_manifest.csv, one row per Pand over all chunks
+for chunk in tqdm(read_chunks(), desc="Writing splits", unit="chunk"):
+    row_split = assign(chunk, strata)
+    for split in SPLITS:
+        part = chunk[row_split == split]
+        if part.empty:
+            continue
+        part.to_csv(OUTPUTS[split], mode="w" if first_write[split] else "a",
+                    header=first_write[split], index=False)
+        first_write[split] = False
+        counts[split] += len(part)
+
+    manifest_rows = pd.DataFrame({"Pand ID": chunk["Pand ID"], "Archetype ID": chunk["Archetype ID"],
+                                  "Split": row_split}).drop_duplicates("Pand ID")
+    manifest_rows = manifest_rows[~manifest_rows["Pand ID"].isin(manifest_ids)]
+    manifest_ids.update(manifest_rows["Pand ID"])
+    manifest_rows.to_csv(MANIFEST_CSV, mode="w" if first_write["manifest"] else "a",
+                         header=first_write["manifest"], index=False)
+    first_write["manifest"] = False
+
+for split in SPLITS:
+    print(f"{split}: {counts[split]:,} rows")
 
 print("\nTrain file      :", OUTPUT_TRAIN)
 print("Validation file :", OUTPUT_VALIDATION)
 print("Test  file      :", OUTPUT_TEST)
+print("Manifest        :", MANIFEST_CSV)
@@ -1,7 +1,11 @@
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
 from tqdm import tqdm
 
+from vertex_ragged import RaggedVertices
+
 # combined veretx file should be the same for 2002, 2050, 2080, same pands removed from dataset. 
 # paths
 SPLITS = ["train", "test", "validate"]
@@ -11,28 +15,81 @@ OUTPUT_ROOT = FEATURES_ROOT   # Save output alongside input splits
 
 CHUNK = 100_000   # rows per chunk when streaming the large surface file
 
-for split in SPLITS:
-    features_csv = FEATURES_ROOT / f"{split}.csv"
-    output_csv   = OUTPUT_ROOT  / f"vertex_{split}.csv"
-    output_csv.parent.mkdir(parents=True, exist_ok=True)
-    
-    print(f"\nProcessing {split} ...")
-    # load Pand IDs as strings
-    pand_ids = pd.read_csv(features_csv, usecols=["Pand ID"], dtype={"Pand ID": "string"})["Pand ID"]
-    pand_set = set(pand_ids)
-    print(f"Loaded {len(pand_set):,} target Pand IDs for {split}.")
-
-    # stream-filter the surfaces CSV
-    first_write = True
-    with tqdm(desc=f"Filtering surface rows ({split})", unit="rows") as pbar:
-        for chunk in pd.read_csv(VERTEX_CSV, dtype={"Pand ID": "string"}, chunksize=CHUNK):
-            keep_chunk = chunk[chunk["Pand ID"].isin(pand_set)]
-            if not keep_chunk.empty:
-                keep_chunk.to_csv(output_csv, mode="w" if first_write else "a",
-                                  header=first_write, index=False)
-                first_write = False
+# "ragged": filter flat_vertex_ALL.npz of 4C_merge_vertices.py per split (vertex_{split}.npz)
+# "parquet": padded flat_vertex_ALL.parquet of 4C_merge_vertices.py, read in row batches
+# "csv":     legacy padded csv
+FORMAT = "ragged"
+VERTEX_RAGGED  = VERTEX_CSV.with_suffix(".npz")
+VERTEX_PARQUET = VERTEX_CSV.with_suffix(".parquet")
+
+def split_index():
+    """
+    Pand ID index over all splits and the split number (position in SPLITS) of every entry.
+    """
+    ids, codes = [], []
+    for k, split in enumerate(SPLITS):
+        pand_ids = pd.read_csv(FEATURES_ROOT / f"{split}.csv", usecols=["Pand ID"],
+                               dtype={"Pand ID": "string"})["Pand ID"].drop_duplicates()
+        print(f"Loaded {len(pand_ids):,} target Pand IDs for {split}.")
+        ids.append(pand_ids)
+        codes.append(np.full(len(pand_ids), k, dtype=np.int8))
+    index = pd.Index(pd.concat(ids, ignore_index=True))
+    if not index.is_unique:
+        raise ValueError("Pand IDs assigned to more than one split")
+    return index, np.concatenate(codes)
+
+def split_ragged():
+    index, codes = split_index()
+    vertices = RaggedVertices.load(VERTEX_RAGGED)
+    parts = vertices.split(dict(zip(index, np.asarray(SPLITS)[codes])))
+    for split in SPLITS:
+        output_path = OUTPUT_ROOT / f"vertex_{split}.npz"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        subset = parts.get(split, vertices.take([]))
+        subset.save(output_path)
+        print(f"{split}: {subset.n_buildings:,} buildings, {subset.n_surfaces:,} surfaces -> {output_path}")
+
+def vertex_chunks():
+    """
+    The padded surface table in chunks of CHUNK rows, Pand ID as string.
+    """
+    if FORMAT == "parquet":
+        for batch in pq.ParquetFile(VERTEX_PARQUET).iter_batches(batch_size=CHUNK):
+            chunk = batch.to_pandas()
+            chunk["Pand ID"] = chunk["Pand ID"].astype("string")
+            yield chunk
+    else:
+        yield from pd.read_csv(VERTEX_CSV, dtype={"Pand ID": "string"}, chunksize=CHUNK)
+
+def split_csv():
+    index, codes = split_index()
+    outputs = [OUTPUT_ROOT / f"vertex_{split}.csv" for split in SPLITS]
+    for output_csv in outputs:
+        output_csv.parent.mkdir(parents=True, exist_ok=True)
+    first_write = [True] * len(SPLITS)
+    counts = [0] * len(SPLITS)
+
+    # one pass over the surfaces table, every row routed to its split
+    with tqdm(desc="Routing surface rows", unit="rows") as pbar:
+        for chunk in vertex_chunks():
+            pos = index.get_indexer(chunk["Pand ID"])
+            row_split = np.where(pos >= 0, codes[pos], -1)
+            for k, output_csv in enumerate(outputs):
+                keep_chunk = chunk[row_split == k]
+                if keep_chunk.empty:
+                    continue
+                keep_chunk.to_csv(output_csv, mode="w" if first_write[k] else "a",
+                                  header=first_write[k], index=False)
+                first_write[k] = False
+                counts[k] += len(keep_chunk)
             pbar.update(len(chunk))
 
-    print("Filtered CSV saved to:", output_csv)
+    for split, output_csv, n in zip(SPLITS, outputs, counts):
+        print(f"{split}: {n:,} surface rows -> {output_csv}")
+
+if FORMAT == "ragged":
+    split_ragged()
+else:
+    split_csv()
 
 print("\nAll splits complete.")
@@ -6,30 +6,64 @@
 import pandas as pd
 from pathlib import Path
 
+from vertex_ragged import RaggedVertices
+
 # paths
 VERTEX_DIR = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\5_split\2080")
 FEAT_DIR = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\6_scale\2080")
 
 OUTPUT_DIR = FEAT_DIR
 
+# "ragged": vertex_{split}.npz of 5B_split_vertex_multi.py, the surfaces are not repeated per feature row:
+#           combined_feat_vertex_{split}.npz (surfaces) + combined_feat_vertex_{split}_features.csv
+#           (feature rows, "Building Index" points to the building in the npz)
+#           read with vertex_dataset.FeatureVertexDataset, the join happens per batch
+# "csv":    legacy padded csv, one row per surface with the building features
+FORMAT = "ragged"
+
 
 splits = ["train", "validate", "test"]
 
-for split in splits:
-    feat_file = FEAT_DIR / f"{split}_scale.csv"
-    vertex_file = VERTEX_DIR / f"vertex_{split}.csv"
-    output_path = OUTPUT_DIR / f"combined_feat_vertex_{split}.csv"
+def merge_ragged():
+    for split in splits:
+        feat_file = FEAT_DIR / f"{split}_scale.csv"
+        vertex_file = VERTEX_DIR / f"vertex_{split}.npz"
+
+        print(f"Processing {split} ...")
+        high_level_df = pd.read_csv(feat_file, dtype={"Pand ID": "string"})
+        vertices = RaggedVertices.load(vertex_file)
+
+        # keep only buildings with feature rows, then point the rows at them
+        vertices = vertices.filter(set(high_level_df["Pand ID"].dropna()))
+        joined = vertices.join_features(high_level_df)
+
+        vertices.save(OUTPUT_DIR / f"combined_feat_vertex_{split}.npz")
+        joined.to_csv(OUTPUT_DIR / f"combined_feat_vertex_{split}_features.csv", index=False)
+        print(f"{len(joined)} feature rows, {vertices.n_buildings} buildings, {vertices.n_surfaces} surfaces")
+        if len(joined) < len(high_level_df):
+            print(f"{len(high_level_df) - len(joined)} feature rows without vertex data dropped")
+
+def merge_csv():
+    for split in splits:
+        feat_file = FEAT_DIR / f"{split}_scale.csv"
+        vertex_file = VERTEX_DIR / f"vertex_{split}.csv"
+        output_path = OUTPUT_DIR / f"combined_feat_vertex_{split}.csv"
+
+        # Load datasets
+        print(f"Processing {split} ...")
+        high_level_df = pd.read_csv(feat_file, dtype={"Pand ID": "string"})
+        surface_df    = pd.read_csv(vertex_file, dtype={"Pand ID": "string"})
 
-    # Load datasets
-    print(f"Processing {split} ...")
-    high_level_df = pd.read_csv(feat_file, dtype={"Pand ID": "string"})
-    surface_df    = pd.read_csv(vertex_file, dtype={"Pand ID": "string"})
+        # Merge on Pand ID
+        merged_df = pd.merge(surface_df, high_level_df, on='Pand ID', how='left')
 
-    # Merge on Pand ID
-    merged_df = pd.merge(surface_df, high_level_df, on='Pand ID', how='left')
+        # Save to output CSV
+        merged_df.to_csv(output_path, index=False)
+        print(f"Combined file saved to: {output_path}")
 
-    # Save to output CSV
-    merged_df.to_csv(output_path, index=False)
-    print(f"Combined file saved to: {output_path}")
+if FORMAT == "ragged":
+    merge_ragged()
+else:
+    merge_csv()
 
 print("All splits processed.")
@@ -7,6 +7,10 @@ Reads train.csv / val.csv / test.csv, fits:
 
 Writes CSVs plus joblib scaler dictionaries.
 
+Out of core: the parameters are fitted in one chunked pass over train.csv
+(masked count / mean / M2 merged per chunk with Chan's update, min / max),
+then every split is transformed chunk by chunk and appended to its output.
+
 2020
 2050
 2080
@@ -15,12 +19,10 @@ Writes CSVs plus joblib scaler dictionaries.
 
 from pathlib import Path
 import joblib
+import numpy as np
 import pandas as pd
-from pandas.api.types import is_numeric_dtype
 from tqdm import tqdm
 
-tqdm.pandas()
-
 # paths
 ROOT_INPUT = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\5_clean_split\2020")
 
@@ -38,6 +40,9 @@ SCALER_DIR = ROOT_OUTPUT
 
 ROOT_OUTPUT.mkdir(parents=True, exist_ok=True)
 
+CHUNK = 100_000   # rows per chunk
+PAD = -1          # missing value, excluded from the fit and kept as is
+
 ID_COLS = ["Pand ID", "Archetype ID", "Construction Year"]
 STD_COLS = [
     "Number of Floors",	"Wall Area", "Roof Area (Flat)", "Roof Area (Sloped)",
@@ -48,81 +53,89 @@ STD_COLS = [
 ]
 TARGET_COLS = ["Annual Heating", "Annual Cooling"]
 
-# Dynamically gather all temp_avg_* and rad_avg_* columns from the train set
-def get_const_cols(df):
-    return [col for col in df.columns if col.startswith("temp_avg_") or col.startswith("rad_avg_")]
-
-def preprocess(df: pd.DataFrame, const_cols) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = df.columns.str.strip()
-    wanted = ID_COLS + TARGET_COLS + STD_COLS + const_cols
-    keep   = [c for c in wanted if c in df.columns]
-    return df[keep]
-
-print("Loading CSVs …")
-train_raw = pd.read_csv(PATH_TRAIN, dtype={c: "string" for c in ID_COLS})
-const_cols = get_const_cols(train_raw)
-train_df = preprocess(train_raw, const_cols)
-val_df   = preprocess(pd.read_csv(PATH_VALIDATION, dtype={c: "string" for c in ID_COLS}), const_cols)
-test_df  = preprocess(pd.read_csv(PATH_TEST,      dtype={c: "string" for c in ID_COLS}), const_cols)
-
-# Standard scaling (for features)
-def fit_standard_params(s: pd.Series):
-    mask = s != -1
-    return float(s[mask].mean()), float(s[mask].std(ddof=0) or 1.0)
-
-def standard_transform(s: pd.Series, mean: float, std: float):
-    if not is_numeric_dtype(s): return s
-    out = s.astype(float).copy()
-    mask = out != -1
-    out.loc[mask] = (out.loc[mask] - mean) / std
-    return out
-
-# Minmax scaling (for targets)
-def fit_minmax_params(s: pd.Series):
-    mask = s != -1
-    vmin = s[mask].min()
-    return float(vmin), float(s[mask].max() - vmin or 1.0)
-
-def minmax_transform(s: pd.Series, vmin: float, vrange: float):
-    if not is_numeric_dtype(s): return s
-    out = s.astype(float).copy()
-    mask = out != -1
-    out.loc[mask] = (out.loc[mask] - vmin) / vrange
-    return out
-
-# Fit scalers on train set only
-print("Fitting Standard params …")
-std_params = {c: fit_standard_params(train_df[c]) for c in tqdm([c for c in STD_COLS if c in train_df.columns])}
-
-print("Fitting Min-Max params …")
-mm_params  = {c: fit_minmax_params(train_df[c])   for c in tqdm(TARGET_COLS)}
+# Dynamically gather all temp_avg_* and rad_avg_* columns from the train header
+def get_const_cols(columns):
+    return [col for col in columns if col.startswith("temp_avg_") or col.startswith("rad_avg_")]
+
+def read_chunks(path):
+    for chunk in pd.read_csv(path, dtype={c: "string" for c in ID_COLS}, chunksize=CHUNK):
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+header = pd.read_csv(PATH_TRAIN, nrows=0).columns.str.strip()
+const_cols = get_const_cols(header)
+wanted = ID_COLS + TARGET_COLS + STD_COLS + const_cols
+keep_cols = [c for c in wanted if c in header]
+std_cols = [c for c in STD_COLS if c in header]
+
+class MaskedStats:
+    """
+    Running count / mean / M2 / min / max per column over the values != PAD (and not NaN).
+    """
+    def __init__(self, n_cols):
+        self.n = np.zeros(n_cols)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+
+    def update(self, block: np.ndarray):
+        valid = (block != PAD) & ~np.isnan(block)
+        n_b = valid.sum(axis=0).astype(float)
+        x = np.where(valid, block, 0.0)
+        mean_b = x.sum(axis=0) / np.maximum(n_b, 1)
+        m2_b = (np.where(valid, block - mean_b, 0.0) ** 2).sum(axis=0)
+
+        # Chan et al. merge of (n, mean, M2)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        safe_n = np.maximum(n, 1)
+        self.mean = self.mean + delta * n_b / safe_n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / safe_n
+        self.n = n
+
+        self.min = np.minimum(self.min, np.where(valid, block, np.inf).min(axis=0))
+        self.max = np.maximum(self.max, np.where(valid, block, -np.inf).max(axis=0))
+
+    def std(self):
+        return np.sqrt(self.m2 / np.maximum(self.n, 1))
+
+# Fit scalers on train set only, one pass
+fit_cols = std_cols + TARGET_COLS
+stats = MaskedStats(len(fit_cols))
+for chunk in tqdm(read_chunks(PATH_TRAIN), desc="Fitting Standard / Min-Max params", unit="chunk"):
+    stats.update(chunk[fit_cols].to_numpy(dtype=float))
+
+std = stats.std()
+vrange = stats.max - stats.min
+# Standard scaling (for features), Minmax scaling (for targets)
+std_params = {c: (float(stats.mean[i]), float(std[i] or 1.0))
+              for i, c in enumerate(fit_cols) if c in std_cols}
+mm_params  = {c: (float(stats.min[i]), float(vrange[i] or 1.0))
+              for i, c in enumerate(fit_cols) if c in TARGET_COLS}
 
 SCALER_DIR.mkdir(parents=True, exist_ok=True)
 joblib.dump(std_params, SCALER_DIR / "std_params.joblib")
 joblib.dump(mm_params,  SCALER_DIR / "mm_params.joblib")
 
-def apply_scaling(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    for col, (m, s) in std_params.items():
-        if col in out.columns:
-            out[col] = standard_transform(out[col], m, s)
-    for col, (vmin, vr) in mm_params.items():
-        if col in out.columns:
-            out[col] = minmax_transform(out[col], vmin, vr)
-    return out
-
-print("Transforming train / val / test …")
-train_scaled = apply_scaling(train_df).fillna(-1)
-val_scaled   = apply_scaling(val_df).fillna(-1)
-test_scaled  = apply_scaling(test_df).fillna(-1)
-
-# Output
-print("Writing compressed CSVs …")
+# (x - shift) / scale for every fitted column, PAD values are not touched
+scale_cols = list(std_params) + list(mm_params)
+shift = np.array([p[0] for p in std_params.values()] + [p[0] for p in mm_params.values()])
+scale = np.array([p[1] for p in std_params.values()] + [p[1] for p in mm_params.values()])
+
+def apply_scaling(chunk: pd.DataFrame) -> pd.DataFrame:
+    out = chunk.reindex(columns=keep_cols)
+    block = out[scale_cols].to_numpy(dtype=float)
+    out[scale_cols] = np.where(block != PAD, (block - shift) / scale, block)
+    return out.fillna(PAD)
+
 OUT_TRAIN.parent.mkdir(parents=True, exist_ok=True)
-train_scaled.to_csv(OUT_TRAIN, index=False, na_rep="-1", float_format="%.4f")
-val_scaled.to_csv(OUT_VALIDATION, index=False, na_rep="-1", float_format="%.4f")
-test_scaled.to_csv(OUT_TEST, index=False, na_rep="-1", float_format="%.4f")
+for src, dst in [(PATH_TRAIN, OUT_TRAIN), (PATH_VALIDATION, OUT_VALIDATION), (PATH_TEST, OUT_TEST)]:
+    first_write = True
+    for chunk in tqdm(read_chunks(src), desc=f"Scaling {src.name}", unit="chunk"):
+        apply_scaling(chunk).to_csv(dst, mode="w" if first_write else "a", header=first_write,
+                                    index=False, na_rep="-1", float_format="%.4f")
+        first_write = False
 
 print("\nDone.")
 print("Scaled train:     ", OUT_TRAIN)
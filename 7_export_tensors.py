@@ -0,0 +1,155 @@
+"""
+EXPORT THE SCALED FEATURE / VERTEX DATASET AS FLOAT32 TENSORS
+
+Reads combined_feat_vertex_{split}_features.csv + .npz of 6B_merge_vertex_to_feat.py and writes
+per split, contiguous .npy files that training opens as memmaps (vertex_dataset.MemmapDataset):
+  X.npy       (n, features)             float32
+  y.npy       (n, targets)              float32
+  dists.npy   (n, surfaces, dists)      float32
+  angles.npy  (n, surfaces, units, 2)   float32
+  types.npy   (n, surfaces)             int8, codes of vertex_ragged.SURFACE_TYPES, -1 padding
+  mask.npy    (n, surfaces)             float32
+  pand_ids.npy (n,)                     str
+  schema.json  column order, shapes, tensor sizes, row shuffle seed, scaler parameters + file hashes
+
+rows are written in a seeded random order, so contiguous mini-batches are already mixed
+and the loader only has to shuffle the batch order (zero-copy slices)
+
+tensor sizes are the maximum over all splits (geometry only, no labels), so no surface is cut.
+with fixed TENSOR_SIZES the dropped surfaces / values are counted per split (schema.json "truncated")
+and the export stops unless ALLOW_TRUNCATION is set
+
+2020
+2050
+2080
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+from tqdm import tqdm
+
+from vertex_dataset import FeatureVertexDataset, MEMMAP_FILES
+from vertex_ragged import PAD_VALUE, SURFACE_TYPES, RaggedVertices
+
+# paths
+FEAT_DIR   = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\6_scale\2080")     # 6B output
+SCALER_DIR = FEAT_DIR                                                           # std_params / mm_params
+OUTPUT_DIR = Path(r"C:\thesis\CLEAN_WORKFLOW\4_data_struct_out\7_tensors\2080")
+
+splits = ["train", "validate", "test"]
+
+SHUFFLE_SEED = 42   # row order of the export, None keeps the order of the features csv
+CHUNK = 4096        # rows padded / written at once
+
+# {"max_surfaces", "max_dists", "max_units"}, None takes the maximum over all splits
+TENSOR_SIZES = None
+ALLOW_TRUNCATION = False   # export even when surfaces / values do not fit TENSOR_SIZES
+
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def scaler_provenance() -> dict:
+    out = {}
+    for name in ("std_params", "mm_params"):
+        path = SCALER_DIR / f"{name}.joblib"
+        params = joblib.load(path)
+        out[name] = {"file": str(path), "sha256": file_sha256(path),
+                     "params": {c: list(v) for c, v in params.items()}}
+    return out
+
+def max_sizes() -> dict:
+    """
+    Largest surface count / distances / angle pairs over all splits.
+    """
+    sizes = {"max_surfaces": 0, "max_dists": 0, "max_units": 0}
+    for split in splits:
+        vertices = RaggedVertices.load(FEAT_DIR / f"combined_feat_vertex_{split}.npz")
+        counts = vertices.surface_counts()
+        max_d, max_u = vertices.max_lengths()
+        sizes["max_surfaces"] = max(sizes["max_surfaces"], int(counts.max()) if len(counts) else 0)
+        sizes["max_dists"] = max(sizes["max_dists"], max_d)
+        sizes["max_units"] = max(sizes["max_units"], max_u)
+    return sizes
+
+def truncation(split, sizes) -> dict:
+    """
+    Geometry of the split that does not fit the tensor sizes, counted once per building.
+    """
+    vertices = RaggedVertices.load(FEAT_DIR / f"combined_feat_vertex_{split}.npz")
+    truncated = vertices.truncation(sizes["max_surfaces"], sizes["max_dists"], sizes["max_units"])
+    if any(truncated.values()):
+        print(f"[WARNING] {split}: {truncated['surfaces']} surfaces of {truncated['buildings']} buildings, "
+              f"{truncated['dists']} distances and {truncated['angle_pairs']} angle pairs "
+              f"do not fit the tensor sizes")
+    return truncated
+
+def export_split(split, sizes, scalers, truncated) -> dict:
+    ds = FeatureVertexDataset.load(FEAT_DIR, split, **sizes)
+    n = len(ds)
+    order = np.random.default_rng(SHUFFLE_SEED).permutation(n) if SHUFFLE_SEED is not None else np.arange(n)
+
+    out_dir = OUTPUT_DIR / split
+    out_dir.mkdir(parents=True, exist_ok=True)
+    first = ds.batch(order[:1])
+    arrays = {}
+    for name in MEMMAP_FILES:
+        arrays[name] = np.lib.format.open_memmap(out_dir / f"{name}.npy", mode="w+", dtype=first[name].dtype,
+                                                 shape=(n,) + first[name].shape[1:])
+
+    for start in tqdm(range(0, n, CHUNK), desc=f"Exporting {split}", unit="chunk"):
+        batch = ds.batch(order[start:start + CHUNK])
+        for name, arr in arrays.items():
+            arr[start:start + len(batch["X"])] = batch[name]
+    for arr in arrays.values():
+        arr.flush()
+    del arrays
+
+    schema = {
+        "split": split,
+        "rows": n,
+        "feature_cols": ds.feature_cols,
+        "target_cols": ds.target_cols,
+        "max_surfaces": ds.max_surfaces,
+        "max_dists": ds.max_dists,
+        "max_units": ds.max_units,
+        "surface_types": list(SURFACE_TYPES),
+        "pad_value": PAD_VALUE,
+        "shuffle_seed": SHUFFLE_SEED,
+        "truncated": truncated,
+        "files": {name: {"shape": [n] + list(first[name].shape[1:]), "dtype": str(first[name].dtype)}
+                  for name in MEMMAP_FILES},
+        "source": {"features": str(FEAT_DIR / f"combined_feat_vertex_{split}_features.csv"),
+                   "vertices": str(FEAT_DIR / f"combined_feat_vertex_{split}.npz")},
+        "scalers": scalers,
+    }
+    with open(out_dir / "schema.json", "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+    print(f"{split}: {n:,} rows -> {out_dir}")
+    return schema
+
+if __name__ == "__main__":
+    scalers = scaler_provenance()
+
+    # same tensor sizes for all splits, so shapes match between splits
+    sizes = TENSOR_SIZES or max_sizes()
+    print(f"Tensor sizes: {sizes}")
+
+    # checked for all splits before anything is written
+    truncated = {split: truncation(split, sizes) for split in splits}
+    if not ALLOW_TRUNCATION and any(any(t.values()) for t in truncated.values()):
+        raise ValueError("surfaces / values do not fit TENSOR_SIZES, set ALLOW_TRUNCATION to export anyway")
+
+    for split in splits:
+        export_split(split, sizes, scalers, truncated[split])
+    print("All splits exported.")
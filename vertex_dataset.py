@@ -0,0 +1,118 @@
+# normalized feature / vertex dataset of 6B_merge_vertex_to_feat.py, joined per batch
+#
+# per split, in the 6B output folder:
+#   combined_feat_vertex_{split}_features.csv   building table, one row per feature row (baseline,
+#                                               retrofit, ..), "Building Index" points into the npz
+#   combined_feat_vertex_{split}.npz            surface table + building -> surface offsets (vertex_ragged.py)
+# the surfaces are only padded for the buildings of the batch that is being read
+#
+# MemmapDataset reads the float32 export of 7_export_tensors.py (one .npy per tensor + schema.json),
+# batches are slices of the memmaps, nothing is parsed or copied at start-up
+
+from pathlib import Path
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from vertex_ragged import RaggedVertices
+
+ID_COLS = ["Pand ID", "Archetype ID", "Construction Year"]
+TARGET_COLS = ["Annual Heating", "Annual Cooling"]
+INDEX_COL = "Building Index"
+
+MEMMAP_FILES = ("X", "y", "dists", "angles", "types", "mask", "pand_ids")
+
+
+class FeatureVertexDataset:
+
+    def __init__(self, features: pd.DataFrame, vertices: RaggedVertices,
+                 feature_cols=None, target_cols=TARGET_COLS,
+                 max_surfaces=None, max_dists=None, max_units=None):
+        """
+        feature_cols: None takes every column that is not an id, target or the building index.
+        max_*: tensor sizes, None uses the maximum of the split (same shape for every batch).
+        """
+        if feature_cols is None:
+            skip = set(ID_COLS) | set(target_cols) | {INDEX_COL}
+            feature_cols = [c for c in features.columns if c not in skip]
+        self.feature_cols = list(feature_cols)
+        self.target_cols = list(target_cols)
+        self.pand_ids = features["Pand ID"].astype(str).to_numpy(dtype=str)
+        self.building_index = features[INDEX_COL].to_numpy(dtype=np.int64)
+        self.X = features[self.feature_cols].to_numpy(dtype=np.float32)
+        self.y = features[self.target_cols].to_numpy(dtype=np.float32)
+        self.vertices = vertices
+
+        auto_d, auto_u = vertices.max_lengths()
+        counts = vertices.surface_counts()
+        self.max_surfaces = (int(counts.max()) if len(counts) else 0) if max_surfaces is None else max_surfaces
+        self.max_dists = auto_d if max_dists is None else max_dists
+        self.max_units = auto_u if max_units is None else max_units
+
+    @classmethod
+    def load(cls, directory, split, **kwargs):
+        directory = Path(directory)
+        features = pd.read_csv(directory / f"combined_feat_vertex_{split}_features.csv",
+                               dtype={c: "string" for c in ID_COLS})
+        vertices = RaggedVertices.load(directory / f"combined_feat_vertex_{split}.npz")
+        return cls(features, vertices, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+    def batch(self, rows) -> dict:
+        """
+        Model-ready arrays of the given feature rows: X, y, dists, angles, types, mask, pand_ids.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        surfaces = self.vertices.take(self.building_index[rows]).padded(
+            self.max_surfaces, self.max_dists, self.max_units)
+        return {"X": self.X[rows], "y": self.y[rows], "pand_ids": self.pand_ids[rows], **surfaces}
+
+    def batches(self, batch_size, shuffle=True, seed=None):
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for start in range(0, len(order), batch_size):
+            yield self.batch(order[start:start + batch_size])
+
+
+class MemmapDataset:
+
+    def __init__(self, directory):
+        """
+        directory: split folder of 7_export_tensors.py
+        """
+        directory = Path(directory)
+        with open(directory / "schema.json", "r", encoding="utf-8") as f:
+            self.schema = json.load(f)
+        self.arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in MEMMAP_FILES}
+        for name, spec in self.schema["files"].items():
+            if list(self.arrays[name].shape) != spec["shape"] or str(self.arrays[name].dtype) != spec["dtype"]:
+                raise ValueError(f"{directory / name}.npy does not match schema.json")
+
+    @classmethod
+    def load(cls, directory, split):
+        return cls(Path(directory) / split)
+
+    @property
+    def feature_cols(self) -> list:
+        return self.schema["feature_cols"]
+
+    @property
+    def target_cols(self) -> list:
+        return self.schema["target_cols"]
+
+    def __len__(self) -> int:
+        return self.schema["rows"]
+
+    def batches(self, batch_size, shuffle=True, seed=None):
+        """
+        Contiguous row blocks of batch_size as read-only memmap slices, shuffle permutes the
+        block order (the rows are already shuffled once by the export).
+        """
+        starts = np.arange(0, len(self), batch_size)
+        if shuffle:
+            starts = np.random.default_rng(seed).permutation(starts)
+        for start in starts:
+            yield {name: arr[start:start + batch_size] for name, arr in self.arrays.items()}
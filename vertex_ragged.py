@@ -0,0 +1,265 @@
+# ragged (CSR) storage of the per-surface vertex features
+#
+# one row per exploded surface (see 3D_flatten_vertex.py), no padding on disk:
+#   pand_ids          (n_buildings,)      Pand ID per building
+#   building_offsets  (n_buildings + 1,)  first surface row of each building
+#   surface_types     (n_surfaces,)       G / F / R
+#   dist_values       (n_dists,)          distances of all surfaces, back to back
+#   dist_offsets      (n_surfaces + 1,)   first distance of each surface
+#   angle_values      (n_angles, 2)       ux, uy pairs of all surfaces
+#   angle_offsets     (n_surfaces + 1,)   first angle pair of each surface
+# padding to the legacy d1..dN / ux1, uy1 .. columns only happens in to_dense (read time),
+# padded() gives the per building tensors for a batch (see vertex_dataset.py)
+# take / filter / split / concat / join_features work on the arrays, nothing is densified
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+PAD_VALUE = -1
+SURFACE_TYPES = ("G", "F", "R")    # type codes of padded(), -1 for padding
+
+FIELDS = ("pand_ids", "building_offsets", "surface_types",
+          "dist_values", "dist_offsets", "angle_values", "angle_offsets")
+
+
+def _offsets(lengths):
+    out = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=out[1:])
+    return out
+
+
+def _scatter(values, offsets, width, pad):
+    """
+    Padded (n_rows, width, ..) array of the CSR rows, values beyond width are dropped.
+    """
+    n = len(offsets) - 1
+    lengths = np.diff(offsets)
+    rows = np.repeat(np.arange(n), lengths)
+    cols = np.arange(len(values)) - np.repeat(offsets[:-1], lengths)
+    out = np.full((n, width) + values.shape[1:], pad, dtype=np.float64)
+    keep = cols < width
+    out[rows[keep], cols[keep]] = values[keep]
+    return out
+
+
+def _gather(offsets, rows):
+    """
+    Positions of the CSR slices of the given rows, and the new offsets.
+    """
+    starts, ends = offsets[rows], offsets[rows + 1]
+    lengths = ends - starts
+    new_offsets = _offsets(lengths)
+    positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return positions, new_offsets
+
+
+class RaggedVertices:
+
+    def __init__(self, pand_ids, building_offsets, surface_types,
+                 dist_values, dist_offsets, angle_values, angle_offsets):
+        self.pand_ids = np.asarray(pand_ids, dtype=str)
+        self.building_offsets = np.asarray(building_offsets, dtype=np.int64)
+        self.surface_types = np.asarray(surface_types, dtype=str)
+        self.dist_values = np.asarray(dist_values, dtype=np.float64)
+        self.dist_offsets = np.asarray(dist_offsets, dtype=np.int64)
+        self.angle_values = np.asarray(angle_values, dtype=np.float64).reshape(-1, 2)
+        self.angle_offsets = np.asarray(angle_offsets, dtype=np.int64)
+
+    @classmethod
+    def from_buildings(cls, buildings):
+        """
+        buildings: iterable of (pand_id, surface_types, distances per surface, angle pairs per surface)
+        """
+        pand_ids, n_surf, types, dists, angles = [], [], [], [], []
+        for pand_id, b_types, b_dists, b_angles in buildings:
+            pand_ids.append(pand_id)
+            n_surf.append(len(b_types))
+            types.extend(b_types)
+            dists.extend(b_dists)
+            angles.extend(b_angles)
+        return cls(
+            pand_ids, _offsets(n_surf), types,
+            list(itertools.chain.from_iterable(dists)), _offsets([len(d) for d in dists]),
+            np.array(list(itertools.chain.from_iterable(angles)), dtype=np.float64).reshape(-1, 2),
+            _offsets([len(a) for a in angles]),
+        )
+
+    # io
+
+    def save(self, path) -> None:
+        np.savez(path, **{f: getattr(self, f) for f in FIELDS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(*(data[f] for f in FIELDS))
+
+    # sizes
+
+    @property
+    def n_buildings(self) -> int:
+        return len(self.pand_ids)
+
+    @property
+    def n_surfaces(self) -> int:
+        return len(self.surface_types)
+
+    def surface_counts(self) -> np.ndarray:
+        return np.diff(self.building_offsets)
+
+    def max_lengths(self) -> tuple:
+        """
+        (max distances, max angle pairs) over all surfaces.
+        """
+        max_d = int(np.diff(self.dist_offsets).max()) if self.n_surfaces else 0
+        max_u = int(np.diff(self.angle_offsets).max()) if self.n_surfaces else 0
+        return max_d, max_u
+
+    # selection
+
+    def take(self, buildings):
+        """
+        New set with the given building indices (in that order).
+        """
+        buildings = np.asarray(buildings, dtype=np.int64)
+        surfaces, building_offsets = _gather(self.building_offsets, buildings)
+        dists, dist_offsets = _gather(self.dist_offsets, surfaces)
+        angles, angle_offsets = _gather(self.angle_offsets, surfaces)
+        return RaggedVertices(self.pand_ids[buildings], building_offsets, self.surface_types[surfaces],
+                              self.dist_values[dists], dist_offsets, self.angle_values[angles], angle_offsets)
+
+    def index_of(self, pand_ids) -> np.ndarray:
+        """
+        Building index per Pand ID, -1 where the Pand ID is not in the set.
+        """
+        lookup = {p: i for i, p in enumerate(self.pand_ids)}
+        return np.array([lookup.get(str(p), -1) for p in pand_ids], dtype=np.int64)
+
+    def filter(self, pand_ids):
+        """
+        Buildings whose Pand ID is in pand_ids, in the order of this set (not the order of pand_ids).
+        """
+        keep = np.isin(self.pand_ids, np.asarray(list(pand_ids), dtype=str))
+        return self.take(np.flatnonzero(keep))
+
+    def split(self, assignment: dict) -> dict:
+        """
+        {split name: set} for a {Pand ID: split name} mapping, unassigned buildings are dropped.
+        """
+        labels = np.array([assignment.get(p, "") for p in self.pand_ids], dtype=object)
+        return {name: self.take(np.flatnonzero(labels == name))
+                for name in sorted(set(assignment.values()))}
+
+    @classmethod
+    def concat(cls, parts):
+        parts = list(parts)
+
+        def stack(offsets):
+            out = [np.zeros(1, dtype=np.int64)]
+            base = 0
+            for part in parts:
+                o = getattr(part, offsets)
+                out.append(o[1:] + base)
+                base += o[-1]
+            return np.concatenate(out)
+
+        return cls(
+            np.concatenate([p.pand_ids for p in parts]),
+            stack("building_offsets"),
+            np.concatenate([p.surface_types for p in parts]),
+            np.concatenate([p.dist_values for p in parts]),
+            stack("dist_offsets"),
+            np.concatenate([p.angle_values for p in parts]),
+            stack("angle_offsets"),
+        )
+
+    def join_features(self, features: pd.DataFrame, on="Pand ID") -> pd.DataFrame:
+        """
+        Building level feature rows with the index of their building in this set
+        ("Building Index"). Rows without vertex data are dropped, a building can
+        be referenced by several rows (e.g. baseline + retrofit).
+        """
+        idx = self.index_of(features[on].astype(str))
+        out = features.loc[idx >= 0].copy()
+        out["Building Index"] = idx[idx >= 0]
+        return out.reset_index(drop=True)
+
+    # read-time padding
+
+    def to_dense(self, max_dists=None, max_units=None, pad=PAD_VALUE, interleave=True) -> pd.DataFrame:
+        """
+        Legacy padded table: Pand ID, Surface Index, Surface Type, d1..dN, ux1, uy1, ..
+        interleave=False orders the angles ux1..uxM, uy1..uyM (column order of 4C_merge_vertices.py).
+        """
+        auto_d, auto_u = self.max_lengths()
+        max_dists = auto_d if max_dists is None else max_dists
+        max_units = auto_u if max_units is None else max_units
+
+        counts = self.surface_counts()
+        n = self.n_surfaces
+
+        dists = _scatter(self.dist_values, self.dist_offsets, max_dists, pad)
+        angles = _scatter(self.angle_values, self.angle_offsets, max_units, pad).reshape(n, 2 * max_units)
+
+        df = pd.DataFrame({
+            "Pand ID": np.repeat(self.pand_ids, counts),
+            "Surface Index": np.concatenate([np.arange(c) for c in counts]) if n else np.array([], dtype=int),
+            "Surface Type": self.surface_types,
+        })
+        dist_cols = [f"d{i+1}" for i in range(max_dists)]
+        unit_cols = list(itertools.chain.from_iterable((f"ux{i+1}", f"uy{i+1}") for i in range(max_units)))
+        dense = pd.concat([df, pd.DataFrame(dists, columns=dist_cols),
+                           pd.DataFrame(angles, columns=unit_cols)], axis=1)
+        if not interleave:
+            dense = dense[list(df.columns) + dist_cols + unit_cols[0::2] + unit_cols[1::2]]
+        return dense
+
+    def truncation(self, max_surfaces, max_dists, max_units) -> dict:
+        """
+        What padded() with these sizes would drop: whole surfaces beyond max_surfaces, and
+        distances / angle pairs beyond max_dists / max_units of the surfaces that are kept.
+        """
+        counts = self.surface_counts()
+        cols = np.arange(self.n_surfaces) - np.repeat(self.building_offsets[:-1], counts)
+        keep = cols < max_surfaces
+        n_dists = np.diff(self.dist_offsets)[keep]
+        n_units = np.diff(self.angle_offsets)[keep]
+        return {"buildings": int((counts > max_surfaces).sum()),
+                "surfaces": int((~keep).sum()),
+                "dists": int(np.maximum(n_dists - max_dists, 0).sum()),
+                "angle_pairs": int(np.maximum(n_units - max_units, 0).sum())}
+
+    def padded(self, max_surfaces=None, max_dists=None, max_units=None, pad=PAD_VALUE) -> dict:
+        """
+        Per building tensors (float32):
+          dists (n, S, D), angles (n, S, U, 2), types (n, S) codes of SURFACE_TYPES, mask (n, S)
+        surfaces / values beyond the given sizes are dropped, padding is pad (types -1, mask 0).
+        """
+        auto_d, auto_u = self.max_lengths()
+        counts = self.surface_counts()
+        if max_surfaces is None:
+            max_surfaces = int(counts.max()) if self.n_buildings else 0
+        max_dists = auto_d if max_dists is None else max_dists
+        max_units = auto_u if max_units is None else max_units
+
+        nb = self.n_buildings
+        rows = np.repeat(np.arange(nb), counts)
+        cols = np.arange(self.n_surfaces) - np.repeat(self.building_offsets[:-1], counts)
+        keep = cols < max_surfaces
+        rows, cols = rows[keep], cols[keep]
+
+        dists = np.full((nb, max_surfaces, max_dists), pad, dtype=np.float32)
+        dists[rows, cols] = _scatter(self.dist_values, self.dist_offsets, max_dists, pad)[keep]
+        angles = np.full((nb, max_surfaces, max_units, 2), pad, dtype=np.float32)
+        angles[rows, cols] = _scatter(self.angle_values, self.angle_offsets, max_units, pad)[keep]
+
+        codes = np.full(self.n_surfaces, -1, dtype=np.int8)
+        for k, t in enumerate(SURFACE_TYPES):
+            codes[self.surface_types == t] = k
+        types = np.full((nb, max_surfaces), -1, dtype=np.int8)
+        types[rows, cols] = codes[keep]
+        mask = np.zeros((nb, max_surfaces), dtype=np.float32)
+        mask[rows, cols] = 1.0
+        return {"dists": dists, "angles": angles, "types": types, "mask": mask}